@@ -0,0 +1,66 @@
+"""Time ``import ska`` in fresh interpreters.
+
+Each repetition spawns a new Python process, so the measurement includes every
+module pulled in by ``import ska`` but not the interpreter start-up itself.
+
+Usage::
+
+    python benchmarks/bench_import.py [--repeat 20] [--threshold 100]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SNIPPET = """
+import time
+t0 = time.perf_counter()
+import ska
+t1 = time.perf_counter()
+print((t1 - t0) * 1e3)
+"""
+
+
+def time_import(repeat=20):
+    """Return the wall-clock durations (ms) of ``import ska`` over fresh processes."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [ROOT, env.get("PYTHONPATH")]))
+
+    durations = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", SNIPPET],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        durations.append(float(out.stdout.strip()))
+    return durations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--threshold", type=float, default=100.0, help="in ms")
+    args = parser.parse_args()
+
+    durations = time_import(args.repeat)
+    median = statistics.median(durations)
+    print(
+        f"import ska: median {median:.2f} ms, "
+        f"min {min(durations):.2f} ms, max {max(durations):.2f} ms "
+        f"({args.repeat} runs)"
+    )
+
+    if median > args.threshold:
+        print(f"FAILED: median above {args.threshold:.0f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+"""Time the hot paths of ska, offline, and compare the results between commits.
+
+The filters are the VOTables vendored in benchmarks/fixtures, served by a
+local ska.testing.MockSVO server, and the spectra of the Sun and Vega and the
+taxonomic templates are the CSV files of data/. The cache of ska is moved to
+a temporary directory, so that the benchmarks run without network access and
+leave the user's cache untouched.
+
+Usage::
+
+    python benchmarks/bench_suite.py [-k compute_color] [--repeat 7] [--output results.json]
+    python benchmarks/bench_suite.py --output new.json --compare base.json
+    python benchmarks/bench_suite.py --compare base.json new.json
+"""
+
+import argparse
+import datetime
+import fnmatch
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, "benchmarks", "fixtures")
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+
+from bench_import import time_import  # noqa: E402
+
+# Version of the format of the results
+RESULTS_VERSION = 1
+
+# Spectra of the cache, from the data of the repository
+SPECTRA = {
+    "spectrum_sun.csv": "e490_sun.csv",
+    "spectrum_vega.csv": "vega_stis.csv",
+    "template_mahlke2022.csv": "template_mahlke2022.csv",
+}
+
+V, R, J = "Generic/Johnson.V", "Generic/Johnson.R", "2MASS/2MASS.J"
+
+# Benchmarks by name: (function, setup run before each call or None, in a
+# subprocess or not)
+BENCHMARKS = {}
+
+
+def benchmark(name, setup=None, subprocess=False):
+    """Register a benchmark function"""
+
+    def register(fn):
+        BENCHMARKS[name] = (fn, setup, subprocess)
+        return fn
+
+    return register
+
+
+# --------------------------------------------------------------------------------
+# Start-up
+@benchmark("import_ska", subprocess=True)
+def bench_import(repeat):
+    return [d / 1e3 for d in time_import(repeat)]
+
+
+@benchmark("cli_startup", subprocess=True)
+def bench_cli(repeat):
+    """Wall-clock time of ska --help, including the interpreter start-up"""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [ROOT, env.get("PYTHONPATH")]))
+    command = [sys.executable, "-c", "from ska.cli import cli_ska; cli_ska()", "--help"]
+
+    durations = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run(command, env=env, capture_output=True, check=True)
+        durations.append(time.perf_counter() - t0)
+    return durations
+
+
+# --------------------------------------------------------------------------------
+# Filters
+def forget_filter():
+    """Remove the Johnson V filter from the cache and the registry"""
+    import ska
+
+    ska.Filter.clear_registry()
+    for ext in [".xml", ".npy", ".json"]:
+        path = ska.svo.filter_path(V, ext)
+        if os.path.isfile(path):
+            os.unlink(path)
+
+
+def forget_sidecar():
+    """Remove the sidecar of the Johnson V filter, keeping its VOTable"""
+    import ska
+
+    ska.Filter.clear_registry()
+    for ext in [".npy", ".json"]:
+        path = ska.svo.filter_path(V, ext)
+        if os.path.isfile(path):
+            os.unlink(path)
+
+
+@benchmark("filter_init_download", setup=forget_filter)
+def bench_filter_download():
+    import ska
+
+    ska.Filter(V)
+
+
+@benchmark("filter_init_cold", setup=forget_sidecar)
+def bench_filter_cold():
+    import ska
+
+    ska.Filter(V)
+
+
+@benchmark("filter_init_warm")
+def bench_filter_warm():
+    import ska
+
+    ska.Filter(V)
+
+
+@benchmark("filter_compute_flux")
+def bench_compute_flux():
+    STATE["filter"].compute_flux(STATE["sun"])
+
+
+@benchmark("solar_color")
+def bench_solar_color():
+    STATE["filter"].solar_color(J)
+
+
+# --------------------------------------------------------------------------------
+# Spectra
+@benchmark("compute_color_vega")
+def bench_color_vega():
+    STATE["sun"].compute_color(V, J, phot_sys="Vega")
+
+
+@benchmark("compute_color_ab")
+def bench_color_ab():
+    STATE["sun"].compute_color(V, J, phot_sys="AB")
+
+
+@benchmark("compute_color_st")
+def bench_color_st():
+    STATE["sun"].compute_color(V, J, phot_sys="ST")
+
+
+@benchmark("reflectance_to_color")
+def bench_reflectance_to_color():
+    STATE["template"].reflectance_to_color(V, R, sun=STATE["sun"])
+
+
+@benchmark("from_taxonomy")
+def bench_from_taxonomy():
+    import ska
+
+    ska.Spectrum().from_taxonomy("S")
+
+
+@benchmark("spectrum_from_csv")
+def bench_from_csv():
+    import ska
+
+    ska.Spectrum(os.path.join(ROOT, "data", "hst_sun.csv"))
+
+
+# Objects shared by the benchmarks, built once the cache is ready
+STATE = {}
+
+
+# --------------------------------------------------------------------------------
+def measure(fn, setup=None, repeat=7, min_time=0.2):
+    """Time a function, returning the duration (s) of each of repeat runs
+
+    Without setup, each run calls the function as many times as needed to
+    last min_time, and its duration is the mean duration of a call. With a
+    setup, each run is a single call, after the setup.
+    """
+    fn()
+
+    if setup is not None:
+        durations = []
+        for _ in range(repeat):
+            setup()
+            t0 = time.perf_counter()
+            fn()
+            durations.append(time.perf_counter() - t0)
+        return durations, 1
+
+    # Number of calls per run
+    number = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_time / 10 or number >= 10**6:
+            break
+        number *= 10
+    number = max(1, int(number * min_time / elapsed))
+
+    durations = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        durations.append((time.perf_counter() - t0) / number)
+    return durations, number
+
+
+# --------------------------------------------------------------------------------
+def run(patterns=None, repeat=7, min_time=0.2):
+    """Run the benchmarks matching any of the patterns, in a temporary cache"""
+    import ska
+    from ska.testing import MockSVO
+
+    names = [
+        name
+        for name in BENCHMARKS
+        if not patterns or any(fnmatch.fnmatch(name, f"*{p}*") for p in patterns)
+    ]
+
+    results = {}
+    with tempfile.TemporaryDirectory() as cache:
+        for name, source in SPECTRA.items():
+            shutil.copy(os.path.join(ROOT, "data", source), os.path.join(cache, name))
+
+        with MockSVO(directory=FIXTURES, cache=cache):
+            STATE["sun"] = ska.Spectrum(ska.PATH_SUN)
+            STATE["template"] = ska.Spectrum("S")
+            STATE["filter"] = ska.Filter.get(V)
+            for id in [R, J]:
+                ska.Filter.get(id)
+
+            for name in names:
+                fn, setup, in_subprocess = BENCHMARKS[name]
+                if in_subprocess:
+                    durations, number = fn(repeat), 1
+                else:
+                    durations, number = measure(fn, setup, repeat, min_time)
+                results[name] = summarize(durations, number)
+                print(f"{name:<24} {format_time(results[name]['median'])}")
+
+            STATE.clear()
+
+    return results
+
+
+# --------------------------------------------------------------------------------
+def summarize(durations, number):
+    """Statistics of the durations (s) of the runs of a benchmark"""
+    return {
+        "median": statistics.median(durations),
+        "min": min(durations),
+        "max": max(durations),
+        "stdev": statistics.stdev(durations) if len(durations) > 1 else 0.0,
+        "repeat": len(durations),
+        "number": number,
+    }
+
+
+# --------------------------------------------------------------------------------
+def metadata():
+    """Description of the code and machine the benchmarks ran on"""
+    import ska
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "version": RESULTS_VERSION,
+        "commit": commit,
+        "ska": ska.__version__,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+    }
+
+
+# --------------------------------------------------------------------------------
+def compare(base, new, threshold=0.1):
+    """Print the ratios of the median times of two results, return the regressions"""
+
+    label = lambda r: (r["meta"].get("commit") or "?")[:10]
+    print(f"\n{'benchmark':<24} {label(base):>10} {label(new):>10} {'ratio':>7}")
+
+    regressions = []
+    for name in sorted(set(base["results"]) & set(new["results"])):
+        before = base["results"][name]["median"]
+        after = new["results"][name]["median"]
+        ratio = after / before
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  slower"
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            flag = "  faster"
+        print(
+            f"{name:<24} {format_time(before):>10} {format_time(after):>10} "
+            f"{ratio:>7.2f}{flag}"
+        )
+    return regressions
+
+
+# --------------------------------------------------------------------------------
+def format_time(seconds):
+    """Duration with a readable unit"""
+    for unit, scale in [("s", 1), ("ms", 1e-3), ("us", 1e-6)]:
+        if seconds >= scale:
+            return f"{seconds / scale:.3g} {unit}"
+    return f"{seconds / 1e-9:.3g} ns"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "-k", dest="patterns", action="append", help="Run benchmarks matching"
+    )
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--min-time", type=float, default=0.2, help="in s, per run")
+    parser.add_argument("--output", "-o", help="JSON file to write the results to")
+    parser.add_argument(
+        "--compare",
+        nargs="+",
+        metavar="RESULTS",
+        help="Compare with a results file (or compare two files without running)",
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=0.1, help="Slowdown reported (ratio - 1)"
+    )
+    args = parser.parse_args()
+
+    # Compare two results files
+    if args.compare and len(args.compare) == 2:
+        base, new = [json.load(open(path)) for path in args.compare]
+        sys.exit(1 if compare(base, new, args.threshold) else 0)
+
+    results = {
+        "meta": metadata(),
+        "results": run(args.patterns, args.repeat, args.min_time),
+    }
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.compare:
+        base = json.load(open(args.compare[0]))
+        sys.exit(1 if compare(base, results, args.threshold) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Write the filter VOTables used by the benchmarks.
+
+The filters are synthetic: smooth band-passes with the central wavelength,
+width, detector type and solar flux of common broad-band filters, in the
+format of the SVO Filter Profile Service. They are vendored next to this
+script, so that the benchmarks run without network access.
+
+Usage::
+
+    python benchmarks/fixtures/make_fixtures.py
+"""
+
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+
+from ska.testing import make_votable  # noqa: E402
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Filter ID: facility, instrument, band, central wavelength and FWHM
+# (Angstrom), detector type, and solar flux (erg/cm2/s/A)
+FILTERS = {
+    "Generic/Johnson.U": ("", "", "U", 3600, 600, 1, 110.0),
+    "Generic/Johnson.B": ("", "", "B", 4400, 900, 1, 170.0),
+    "Generic/Johnson.V": ("", "", "V", 5500, 880, 1, 183.0),
+    "Generic/Johnson.R": ("", "", "R", 6600, 1380, 1, 160.0),
+    "Generic/Johnson.I": ("", "", "I", 8000, 1500, 1, 115.0),
+    "SLOAN/SDSS.g": ("SLOAN", "SDSS", "g", 4700, 1260, 1, 185.0),
+    "SLOAN/SDSS.r": ("SLOAN", "SDSS", "r", 6180, 1150, 1, 165.0),
+    "SLOAN/SDSS.i": ("SLOAN", "SDSS", "i", 7500, 1230, 1, 125.0),
+    "SLOAN/SDSS.z": ("SLOAN", "SDSS", "z", 8900, 1000, 1, 90.0),
+    "2MASS/2MASS.J": ("2MASS", "2MASS", "J", 12400, 2100, 0, 30.0),
+    "2MASS/2MASS.H": ("2MASS", "2MASS", "H", 16500, 2500, 0, 11.0),
+    "2MASS/2MASS.Ks": ("2MASS", "2MASS", "Ks", 21600, 2600, 0, 4.5),
+}
+
+
+def main():
+    for id, (
+        facility,
+        instrument,
+        band,
+        center,
+        fwhm,
+        detector,
+        fsun,
+    ) in FILTERS.items():
+        wave = np.linspace(center - 1.2 * fwhm, center + 1.2 * fwhm, 200)
+        trans = np.exp(-0.5 * ((wave - center) / (fwhm / 2.3548)) ** 8)
+        trans[0] = trans[-1] = 0.0
+
+        params = {"Band": band, "Fsun": fsun}
+        if facility:
+            params.update(Facility=facility, Instrument=instrument)
+
+        votable = make_votable(id, wave, trans, detector_type=detector, **params)
+        with open(os.path.join(HERE, id.replace("/", "_") + ".xml"), "wb") as file:
+            file.write(votable)
+
+
+if __name__ == "__main__":
+    main()
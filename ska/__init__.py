@@ -1,29 +1,67 @@
 """Spectral-Kit for Asteroids."""
 
+import importlib
 import os
 
-from .filter import Filter  # noqa
-from .spectrum import Spectrum  # noqa
-from . import svo  # noqa
-from .cache import download_sun_and_vega, download_mahlke_taxonomy  # noqa
-
 __version__ = "2.0"
 
 # Cache location
 PATH_CACHE = os.path.join(os.path.expanduser("~"), ".cache/ska")
-os.makedirs(PATH_CACHE, exist_ok=True)
 
 # SKA Auxiliary data
 PATH_FILTER_LIST = os.path.join(PATH_CACHE, "svo_filters.txt")
+PATH_FILTER_CATALOGUE = os.path.join(PATH_CACHE, "svo_filters.sqlite")
 PATH_VEGA = os.path.join(PATH_CACHE, "spectrum_vega.csv")
 PATH_SUN = os.path.join(PATH_CACHE, "spectrum_sun.csv")
 PATH_MAHLKE = os.path.join(PATH_CACHE, "template_mahlke2022.csv")
+PATH_REFERENCE_FLUXES = os.path.join(PATH_CACHE, "reference_fluxes.json")
+
+# Public names and the submodule providing them. Submodules pull in astropy,
+# pandas and requests, so they are only imported on first access (PEP 562).
+_LAZY = {
+    "Filter": "filter",
+    "FilterBank": "filterbank",
+    "Spectrum": "spectrum",
+    "SpectrumCollection": "collection",
+    "TemplateBank": "taxonomy",
+    "blackbody_colors": "blackbody",
+    "color_temperature": "blackbody",
+    "compute_colors": "colors",
+    "solar_colors": "colors",
+    "download_sun_and_vega": "cache",
+    "download_mahlke_taxonomy": "cache",
+}
+_SUBMODULES = {
+    "batch",
+    "blackbody",
+    "cache",
+    "cli",
+    "collection",
+    "colors",
+    "filter",
+    "filterbank",
+    "interp",
+    "profiling",
+    "spectrum",
+    "store",
+    "svo",
+    "taxonomy",
+    "testing",
+}
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+
+    if name in _LAZY:
+        module = importlib.import_module(f".{_LAZY[name]}", __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
 
-if not os.path.isfile(PATH_FILTER_LIST):
-    svo.download_filter_list()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-if not os.path.isfile(PATH_VEGA) or not os.path.isfile(PATH_SUN):
-    download_sun_and_vega()
 
-if not os.path.isfile(PATH_MAHLKE):
-    download_mahlke_taxonomy()
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY) | _SUBMODULES)
@@ -0,0 +1,301 @@
+import concurrent.futures
+import contextlib
+import glob
+import io
+import json
+import os
+import queue
+import re
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import ska
+
+# State of each worker process: filter pairs and options, set by _init_worker
+_WORKER = {}
+
+# End of the input stream, in the queue of stream_colors
+_EOF = object()
+
+
+# --------------------------------------------------------------------------------
+def resolve_inputs(source):
+    """List the spectrum files designated by a path, a glob or a manifest.
+
+    Parameters
+    ----------
+    source : str
+        A CSV file, a glob pattern (e.g. "spectra/*.csv"), a directory (all
+        its CSV files), or a manifest: a text file prefixed by @ listing one
+        spectrum file per line, relative to the manifest directory.
+
+    Returns
+    -------
+    list of str
+        The spectrum files
+    """
+
+    # Manifest of spectrum files
+    if source.startswith("@"):
+        manifest = source[1:]
+        root = os.path.dirname(os.path.abspath(manifest))
+        with open(manifest, "r") as file:
+            lines = [line.strip() for line in file]
+        return [
+            line if os.path.isabs(line) else os.path.join(root, line)
+            for line in lines
+            if line and not line.startswith("#")
+        ]
+
+    # All CSV files of a directory
+    if os.path.isdir(source):
+        return sorted(glob.glob(os.path.join(source, "*.csv")))
+
+    # A single file, or a glob pattern
+    if os.path.isfile(source):
+        return [source]
+    return sorted(glob.glob(source))
+
+
+# --------------------------------------------------------------------------------
+def color_table(files, pairs, phot_sys="Vega", reflectance=False, jobs=1):
+    """Computes the colors of many spectrum files in many pairs of filters.
+
+    Files are spread over a pool of worker processes, each loading the
+    filters and reference spectra once. Files that cannot be read or
+    processed are reported in the error column instead of stopping the run.
+
+    Parameters
+    ----------
+    files : list of str
+        The spectrum files
+
+    pairs : list of tuple
+        The pairs of filter unique IDs (filter_1, filter_2)
+
+    phot_sys : str
+        Photometric system in which to report the colors (default=Vega)
+
+    reflectance : boolean
+        Set True to multiply the input reflectances by the Solar spectrum
+        (default=False)
+
+    jobs : int
+        Number of worker processes (default=1, no pool)
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per file and pair, with columns file, filter_1, filter_2,
+        color and error
+    """
+
+    pairs = [tuple(pair) for pair in pairs]
+    initargs = (pairs, phot_sys, reflectance)
+
+    if jobs <= 1 or len(files) <= 1:
+        _init_worker(*initargs)
+        results = [_color_file(f) for f in files]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=jobs, initializer=_init_worker, initargs=initargs
+        ) as pool:
+            chunksize = max(1, len(files) // (4 * jobs))
+            results = list(pool.map(_color_file, files, chunksize=chunksize))
+
+    rows = []
+    for file, (colors, error) in zip(files, results):
+        for (f1, f2), color in zip(pairs, colors):
+            rows.append([file, f1, f2, color, error])
+    return pd.DataFrame(
+        rows, columns=["file", "filter_1", "filter_2", "color", "error"]
+    )
+
+
+# --------------------------------------------------------------------------------
+def write_table(table, path):
+    """Write a table of results to a CSV or a Parquet file (from the extension).
+
+    Parameters
+    ----------
+    table : pd.DataFrame
+        The table
+
+    path : str
+        The output file, a Parquet file if it ends with .parquet, CSV otherwise
+    """
+    if path.endswith(".parquet"):
+        table.to_parquet(path, index=False)
+    else:
+        table.to_csv(path, index=False)
+
+
+# --------------------------------------------------------------------------------
+def _init_worker(pairs, phot_sys, reflectance):
+    """Load the filters and reference spectra once per worker process"""
+
+    _WORKER["pairs"] = pairs
+    _WORKER["phot_sys"] = phot_sys
+    _WORKER["reflectance"] = reflectance
+
+    for pair in pairs:
+        for id in pair:
+            ska.Filter.get(id)
+
+    _WORKER["sun"] = None
+    if reflectance:
+        ska.cache.ensure_sun_and_vega()
+        _WORKER["sun"] = ska.Spectrum(ska.PATH_SUN)
+
+
+# --------------------------------------------------------------------------------
+def _color_file(file):
+    """Colors of one spectrum file in all pairs, and the error message if any"""
+
+    pairs = _WORKER["pairs"]
+
+    # Messages of ska (which exits on invalid input) become the error message
+    messages = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(messages):
+            spectrum = ska.Spectrum()
+            spectrum.from_csv(file)
+            colors = ska.compute_colors(
+                [spectrum],
+                pairs,
+                phot_sys=_WORKER["phot_sys"],
+                reflectance=_WORKER["reflectance"],
+                sun=_WORKER["sun"],
+            )[0]
+        return colors.tolist(), None
+
+    except (Exception, SystemExit) as error:
+        message = re.sub(r"\[/?[a-z_ ]+\]", "", messages.getvalue()).strip()
+        if not message:
+            message = f"{type(error).__name__}: {error}"
+        return [np.nan] * len(pairs), message
+
+
+# --------------------------------------------------------------------------------
+def stream_colors(
+    instream, outstream, pairs, phot_sys="Vega", batch_size=1, window=0.0
+):
+    """Computes colors of spectra read as newline-delimited JSON records.
+
+    Each input line is a JSON object with an "id", a "wavelength" array
+    (micron), and either a "flux" or a "reflectance" array. Reflectances are
+    multiplied by the spectrum of the Sun. For each record, a line with the
+    "id" and the "colors" (by "filter_1-filter_2" pair) is written as soon as
+    it is computed, or with an "error" if the record is invalid.
+
+    Records are processed in micro-batches of up to batch_size records, or
+    whatever arrived within window seconds, so that the vectorized color
+    computation is amortized. At most 2 * batch_size records are held in
+    memory.
+
+    Parameters
+    ----------
+    instream : file
+        The input stream, e.g. sys.stdin
+
+    outstream : file
+        The output stream, e.g. sys.stdout
+
+    pairs : list of tuple
+        The pairs of filter unique IDs (filter_1, filter_2)
+
+    phot_sys : str
+        Photometric system in which to report the colors (default=Vega)
+
+    batch_size : int
+        Maximum number of records per batch (default=1)
+
+    window : float
+        Maximum time (s) to wait for a batch to fill up (default=0)
+    """
+
+    pairs = [tuple(pair) for pair in pairs]
+    names = [f"{f1}-{f2}" for f1, f2 in pairs]
+    batch_size = max(1, batch_size)
+
+    # Load filters and reference spectra once
+    _init_worker(pairs, phot_sys, True)
+
+    # Read lines in the background, with a bounded queue
+    lines = queue.Queue(maxsize=batch_size)
+
+    def read():
+        for line in instream:
+            if line.strip():
+                lines.put(line)
+        lines.put(_EOF)
+
+    threading.Thread(target=read, daemon=True).start()
+
+    done = False
+    while not done:
+        # Wait for a first record, then fill the batch until the window closes
+        batch = [lines.get()]
+        deadline = time.monotonic() + window
+        while batch[-1] is not _EOF and len(batch) < batch_size:
+            try:
+                batch.append(lines.get(timeout=max(0, deadline - time.monotonic())))
+            except queue.Empty:
+                break
+
+        if batch[-1] is _EOF:
+            done = True
+            batch.pop()
+
+        for result in _color_records(batch, pairs, names):
+            outstream.write(json.dumps(result) + "\n")
+        outstream.flush()
+
+
+# --------------------------------------------------------------------------------
+def _color_records(lines, pairs, names):
+    """Colors of a batch of JSON records, one result per record"""
+
+    results = [None] * len(lines)
+    groups = {False: [], True: []}
+
+    # Parse and validate records
+    for i, line in enumerate(lines):
+        try:
+            record = json.loads(line)
+            results[i] = {"id": record.get("id")}
+            is_refl = "reflectance" in record
+            wave = np.asarray(record["wavelength"], dtype=float)
+            flux = np.asarray(record["reflectance" if is_refl else "flux"], dtype=float)
+            if wave.ndim != 1 or wave.shape != flux.shape or len(wave) < 2:
+                raise ValueError("wavelength and flux must be arrays of same length")
+            order = np.argsort(wave)
+            groups[is_refl].append((i, wave[order], flux[order]))
+        except Exception as error:
+            if results[i] is None:
+                results[i] = {"id": None}
+            results[i]["error"] = f"{type(error).__name__}: {error}"
+
+    # Vectorized colors of each group
+    for is_refl, group in groups.items():
+        if not group:
+            continue
+        collection = ska.SpectrumCollection.from_arrays(
+            [wave for _, wave, _ in group], [flux for _, _, flux in group]
+        )
+        colors = ska.compute_colors(
+            collection,
+            pairs,
+            phot_sys=_WORKER["phot_sys"],
+            reflectance=is_refl,
+            sun=_WORKER["sun"],
+        )
+        for (i, _, _), row in zip(group, colors):
+            results[i]["colors"] = {
+                name: (None if np.isnan(c) else c) for name, c in zip(names, row)
+            }
+
+    return results
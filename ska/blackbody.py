@@ -0,0 +1,202 @@
+import functools
+
+import numpy as np
+
+import ska
+
+# Physical constants (SI, exact)
+H = 6.62607015e-34
+C = 299792458.0
+K_B = 1.380649e-23
+
+# Default temperatures (K) of the color-temperature tables
+TEMPERATURES = np.geomspace(500, 100000, 10000)
+
+# Maximum number of samples (temperatures x wavelengths) evaluated at once by
+# blackbody_colors, bounding its memory use (64 MB of float64)
+BLACKBODY_CHUNK = 2**23
+
+
+# --------------------------------------------------------------------------------
+def planck(wave, temperature):
+    """Spectral radiance of blackbodies, for many temperatures at once.
+
+    Parameters
+    ----------
+    wave : np.ndarray
+        The wavelength (micron)
+
+    temperature : float or np.ndarray
+        The temperatures (K)
+
+    Returns
+    -------
+    np.ndarray
+        The (n_temperatures, n_wave) spectral radiance, in
+        erg/s/cm2/Angstrom/sr, or (n_wave,) for a single temperature
+    """
+    wave = np.asarray(wave, dtype=float) * 1e-6
+    temperature = np.asarray(temperature, dtype=float)
+
+    # Planck's law, in W/m2/m/sr, converted to erg/s/cm2/Angstrom/sr
+    x = (H * C / K_B) / np.multiply.outer(temperature, wave)
+    with np.errstate(over="ignore"):
+        radiance = 2 * H * C**2 / wave**5 / np.expm1(x)
+    return radiance * 1e-7
+
+
+# --------------------------------------------------------------------------------
+def blackbody_colors(temperatures, pairs, phot_sys="Vega", vega=None):
+    """Computes the colors of blackbodies at many temperatures in many pairs of filters.
+
+    The spectral radiance of all the temperatures is evaluated at once on
+    the integration grid of the filters, and integrated with a single matrix
+    product, in chunks of temperatures bounded in memory (BLACKBODY_CHUNK).
+
+    Parameters
+    ----------
+    temperatures : float or np.ndarray
+        The temperatures (K)
+
+    pairs : list of tuple
+        The pairs of filters (filter_1, filter_2), each a SKA Filter object
+        or a filter unique ID (see SVO filter service)
+
+    phot_sys : str
+        Photometric system in which to report the colors (default=Vega)
+
+    vega : ska.Spectrum
+        The spectrum of Vega (default=None, the cached spectrum of Vega)
+
+    Returns
+    -------
+    np.ndarray
+        The (n_temperatures, n_pairs) array of filter_1-filter_2 colors
+    """
+    temperatures = np.atleast_1d(np.asarray(temperatures, dtype=float))
+    bank, idx_1, idx_2 = ska.colors._pairs_bank(pairs)
+
+    # Weights of the filters on their integration grid
+    wave = _integration_grid(bank)
+    weights = bank.project(wave).T
+
+    chunk = max(1, BLACKBODY_CHUNK // len(wave))
+    colors = np.empty((len(temperatures), len(idx_1)))
+    for start in range(0, len(temperatures), chunk):
+        fluxes = planck(wave, temperatures[start : start + chunk]) @ weights
+        with np.errstate(divide="ignore", invalid="ignore"):
+            colors[start : start + chunk] = -2.5 * np.log10(
+                fluxes[:, idx_1] / fluxes[:, idx_2]
+            )
+
+    return ska.colors._to_phot_sys(colors, bank, idx_1, idx_2, phot_sys, vega)
+
+
+# --------------------------------------------------------------------------------
+def color_temperature(colors, pair, phot_sys="Vega"):
+    """Temperatures of the blackbodies with the given colors.
+
+    The temperatures are interpolated in a color-temperature table of the
+    pair of filters, computed once over ska.blackbody.TEMPERATURES.
+
+    Parameters
+    ----------
+    colors : float or np.ndarray
+        The filter_1-filter_2 colors
+
+    pair : tuple
+        The pair of filters (filter_1, filter_2), each a SKA Filter object or
+        a filter unique ID (see SVO filter service)
+
+    phot_sys : str
+        Photometric system of the colors (default=Vega)
+
+    Returns
+    -------
+    float or np.ndarray
+        The temperatures (K), NaN for colors outside of the table
+    """
+    ids = tuple(ska.colors._as_filter(f).id for f in pair)
+    table = _table(ids, phot_sys, ska.filter.INTEGRATION_METHOD)
+    return table.temperature(colors)
+
+
+class TemperatureTable:
+    # --------------------------------------------------------------------------------
+    def __init__(self, pair, temperatures=None, phot_sys="Vega", vega=None):
+        """Initiate a SKA table of blackbody colors against temperature
+
+        Only the temperatures over which the color is strictly monotone are
+        kept, so that each color matches a single temperature.
+
+        Parameters
+        ----------
+        pair : tuple
+            The pair of filters (filter_1, filter_2), each a SKA Filter object
+            or a filter unique ID (see SVO filter service)
+
+        temperatures : np.ndarray
+            The temperatures (K) of the table (default=None,
+            ska.blackbody.TEMPERATURES)
+
+        phot_sys : str
+            Photometric system of the colors (default=Vega)
+
+        vega : ska.Spectrum
+            The spectrum of Vega (default=None, the cached spectrum of Vega)
+        """
+
+        if temperatures is None:
+            temperatures = TEMPERATURES
+        temperatures = np.sort(np.asarray(temperatures, dtype=float))
+        colors = blackbody_colors(temperatures, [pair], phot_sys, vega)[:, 0]
+
+        keep = np.isfinite(colors)
+        temperatures, colors = temperatures[keep], colors[keep]
+
+        # Colors sorted by increasing value, then the strictly monotone part
+        if len(colors) > 1 and colors[-1] < colors[0]:
+            temperatures, colors = temperatures[::-1], colors[::-1]
+        keep = np.ones(len(colors), dtype=bool)
+        keep[1:] = colors[1:] > np.maximum.accumulate(colors)[:-1]
+
+        # Store attributes
+        self.pair = tuple(ska.colors._as_filter(f).id for f in pair)
+        self.phot_sys = phot_sys
+        self.colors = colors[keep]
+        self.temperatures = temperatures[keep]
+
+    # --------------------------------------------------------------------------------
+    def temperature(self, colors):
+        """Temperatures of the blackbodies with the given colors.
+
+        Parameters
+        ----------
+        colors : float or np.ndarray
+            The filter_1-filter_2 colors
+
+        Returns
+        -------
+        float or np.ndarray
+            The temperatures (K), NaN for colors outside of the table
+        """
+        return np.interp(
+            colors, self.colors, self.temperatures, left=np.nan, right=np.nan
+        )
+
+
+# --------------------------------------------------------------------------------
+def _integration_grid(bank):
+    """Wavelengths sampling all the filters of a bank"""
+    if bank.method == "grid":
+        return bank.wave
+    return np.unique(
+        np.concatenate([g for f in bank.filters for g in (f.wave, f.quadrature()[0])])
+    )
+
+
+# --------------------------------------------------------------------------------
+@functools.lru_cache(maxsize=64)
+def _table(ids, phot_sys, method):
+    """Return a TemperatureTable, built once per pair of filter IDs and method"""
+    return TemperatureTable(ids, phot_sys=phot_sys)
@@ -1,11 +1,52 @@
 """Cache management for ska"""
 
 import os
+import fnmatch
 import glob
+import hashlib
+import io
+import json
+import sys
+import tarfile
+import threading
+import time
+
+import numpy as np
 import requests
+import rich
 
 import ska
 
+# Fluxes of reference spectra in filters, loaded once from PATH_REFERENCE_FLUXES
+_REFERENCE_FLUXES = None
+_REFERENCE_LOCK = threading.Lock()
+
+# Checksums of the reference spectra files, by (path, size, mtime)
+_FILE_CHECKSUMS = {}
+
+# Version of the layout of cache bundles, and name of their manifest
+BUNDLE_VERSION = 1
+BUNDLE_MANIFEST = "manifest.json"
+
+
+# --------------------------------------------------------------------------------
+# Cache bootstrapping
+def ensure_cache():
+    """Create the cache directory if it does not exist yet."""
+    os.makedirs(ska.PATH_CACHE, exist_ok=True)
+
+
+def ensure_sun_and_vega():
+    """Download the spectra of the Sun and Vega if they are not cached yet."""
+    if not os.path.isfile(ska.PATH_VEGA) or not os.path.isfile(ska.PATH_SUN):
+        download_sun_and_vega()
+
+
+def ensure_mahlke_taxonomy():
+    """Download the templates of Mahlke+2022 taxonomy if they are not cached yet."""
+    if not os.path.isfile(ska.PATH_MAHLKE):
+        download_mahlke_taxonomy()
+
 
 # --------------------------------------------------------------------------------
 # Cache management for Filters
@@ -34,12 +75,22 @@ def clear_filters():
 
     filter_ids, filter_files = filter_inventory()
 
-    # Remove cached filters
+    # Remove cached filters and their binary sidecars
     for f in filter_files:
         os.unlink(os.path.join(ska.PATH_CACHE, f))
 
-    # Remove list of SVO Filters
+        for ext in [".npy", ".json"]:
+            sidecar = os.path.splitext(f)[0] + ext
+            if os.path.isfile(sidecar):
+                os.unlink(sidecar)
+
+    # Remove list and catalogue of SVO Filters
     os.unlink(os.path.join(ska.PATH_CACHE, "svo_filters.txt"))
+    if os.path.isfile(ska.PATH_FILTER_CATALOGUE):
+        os.unlink(ska.PATH_FILTER_CATALOGUE)
+
+    # Fluxes of reference spectra through the removed filters
+    clear_reference_fluxes()
 
 
 def update_filter_list():
@@ -47,18 +98,458 @@ def update_filter_list():
     ska.svo.download_filter_list()
 
 
-def update_filters(ids, force=False):
+def update_filters(ids, force=False, jobs=None):
     """Update the cached filters (VOTable files).
 
     Parameters
     ----------
     ids : list
         List of SVO IDs corresponding to the filters to update.
+
+    force : bool
+        If True, the filters are downloaded even if they are already cached
+
+    jobs : int
+        The number of concurrent downloads (default: ska.svo.JOBS)
+
+    Returns
+    -------
+    dict
+        The error message of each filter ID, None for a success
     """
 
     # Download filters
-    for f in ids:
-        ska.svo.download_filter(f, force=force)
+    report = ska.svo.download_filters(
+        ids, force=force, jobs=ska.svo.JOBS if jobs is None else jobs
+    )
+
+    # Stale entries are never hit again once the transmissions changed
+    if force:
+        clear_reference_fluxes()
+
+    # Report failures
+    for id, error in report.items():
+        if error is not None:
+            rich.print(f"[red]Error downloading filter {id}[/red]: {error}")
+
+    return report
+
+
+def warm_filters(ids, jobs=None):
+    """Download the filters missing from the cache, and build their sidecars.
+
+    Parameters
+    ----------
+    ids : list
+        List of SVO IDs corresponding to the filters to cache.
+
+    jobs : int
+        The number of concurrent downloads (default: ska.svo.JOBS)
+
+    Returns
+    -------
+    dict
+        The error message of each filter ID, None for a success
+    """
+
+    report = update_filters(ids, force=False, jobs=jobs)
+
+    # Sidecars of filters cached by previous versions
+    for id, error in report.items():
+        if error is None:
+            ska.svo.load_filter(id)
+
+    return report
+
+
+# --------------------------------------------------------------------------------
+# Portable bundles of the cache
+def select_filters(patterns):
+    """Select filter IDs by ID, facility, prefix or glob pattern.
+
+    Parameters
+    ----------
+    patterns : list of str
+        Each pattern is either a filter ID (e.g. SLOAN/SDSS.g), a facility
+        (e.g. SLOAN), a prefix of IDs (e.g. SLOAN/SDSS.), or a glob pattern
+        (e.g. */SDSS.?)
+
+    Returns
+    -------
+    list
+        The sorted filter IDs matching any of the patterns
+    """
+
+    index = ska.svo.filter_index()
+
+    ids = set()
+    for pattern in patterns:
+        if pattern in index:
+            matches = [pattern]
+        elif any(char in pattern for char in "*?["):
+            matches = fnmatch.filter(index, pattern)
+        elif "/" in pattern:
+            matches = index.startswith(pattern)
+        else:
+            matches = index.select(pattern)
+
+        if not matches:
+            rich.print(f"[yellow]No filter matching {pattern}[/yellow]")
+        ids.update(matches)
+
+    return sorted(ids)
+
+
+def export_bundle(path, ids=None, jobs=None):
+    """Pack the cache into a compressed bundle, for use on offline machines.
+
+    The bundle is a gzipped tar archive with the filter list and catalogue,
+    the selected filters with their binary sidecars, the reference spectra
+    and templates with their binary spectrum files, and the fluxes of Vega
+    in the filters. Missing filters, sidecars and
+    reference fluxes are computed before packing, so that nothing has to be
+    downloaded or parsed after import. A manifest lists the size, SHA256
+    checksum and modification time of every file.
+
+    Parameters
+    ----------
+    path : str
+        The path to the bundle, e.g. ska_cache.tar.gz
+
+    ids : list
+        The SVO IDs of the filters to pack (default=None, all the cached filters)
+
+    jobs : int
+        The number of concurrent downloads of missing filters (default: ska.svo.JOBS)
+
+    Returns
+    -------
+    dict
+        The manifest of the bundle
+    """
+
+    ska.svo.filter_index()
+    if ids is None:
+        ids = sorted(filter_inventory()[0])
+
+    # Missing filters, sidecars, reference spectra and fluxes
+    report = warm_filters(ids, jobs=jobs)
+    ids = [id for id in ids if report[id] is None]
+    ensure_sun_and_vega()
+    ensure_mahlke_taxonomy()
+    reference_fluxes([ska.Filter.get(id) for id in ids])
+
+    # Files to pack, relative to the cache
+    names = [
+        os.path.basename(ska.PATH_FILTER_LIST),
+        os.path.basename(ska.PATH_FILTER_CATALOGUE),
+    ]
+    for id in ids:
+        names += [
+            os.path.basename(ska.svo.filter_path(id, ext))
+            for ext in [".xml", ".npy", ".json"]
+        ]
+    spectra, templates = spectra_inventory()
+    for f in sorted(spectra | templates):
+        ska.store.read_columns(f)
+        names += [os.path.basename(f), os.path.basename(ska.store.binary_path(f))]
+    names.append(os.path.basename(ska.PATH_REFERENCE_FLUXES))
+    names = [n for n in names if os.path.isfile(os.path.join(ska.PATH_CACHE, n))]
+
+    manifest = {
+        "version": BUNDLE_VERSION,
+        "ska": ska.__version__,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "filters": ids,
+        "files": {},
+    }
+    contents = {}
+    for name in names:
+        file_path = os.path.join(ska.PATH_CACHE, name)
+        with open(file_path, "rb") as file:
+            contents[name] = file.read()
+        manifest["files"][name] = {
+            "size": len(contents[name]),
+            "sha256": hashlib.sha256(contents[name]).hexdigest(),
+            "mtime": os.stat(file_path).st_mtime_ns,
+        }
+
+    # Manifest first, so that import can check the files while extracting
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with tarfile.open(tmp, "w:gz", compresslevel=6) as tar:
+        _add_to_tar(tar, BUNDLE_MANIFEST, json.dumps(manifest, indent=1).encode())
+        for name in names:
+            _add_to_tar(tar, name, contents[name])
+    os.replace(tmp, path)
+
+    return manifest
+
+
+def import_bundle(path):
+    """Unpack a bundle created by export_bundle into the cache.
+
+    All the files are checked against the checksums of the manifest before
+    any of them is moved into the cache. Their modification times are
+    restored, so that the binary sidecars remain valid.
+
+    Parameters
+    ----------
+    path : str
+        The path to the bundle
+
+    Returns
+    -------
+    dict
+        The manifest of the bundle
+    """
+
+    ensure_cache()
+    extracted = {}
+
+    try:
+        with tarfile.open(path, "r:*") as tar:
+            manifest = None
+            for member in tar:
+                content = tar.extractfile(member)
+                if content is None:
+                    continue
+
+                if manifest is None:
+                    if member.name != BUNDLE_MANIFEST:
+                        raise ValueError("manifest missing")
+                    manifest = json.load(content)
+                    if manifest.get("version") != BUNDLE_VERSION:
+                        raise ValueError(
+                            f"unsupported version {manifest.get('version')}"
+                        )
+                    continue
+
+                # Only files of the manifest, without any directory
+                entry = manifest["files"].get(member.name)
+                if entry is None or os.path.basename(member.name) != member.name:
+                    raise ValueError(f"unexpected file {member.name}")
+
+                tmp = os.path.join(ska.PATH_CACHE, f"{member.name}.{os.getpid()}.tmp")
+                extracted[member.name] = tmp
+                sha = hashlib.sha256()
+                with open(tmp, "wb") as file:
+                    for chunk in iter(lambda: content.read(1 << 20), b""):
+                        sha.update(chunk)
+                        file.write(chunk)
+                if sha.hexdigest() != entry["sha256"]:
+                    raise ValueError(f"checksum mismatch for {member.name}")
+
+            if manifest is None:
+                raise ValueError("manifest missing")
+            missing = set(manifest["files"]) - set(extracted)
+            if missing:
+                raise ValueError(f"missing files {', '.join(sorted(missing))}")
+
+    except (OSError, EOFError, ValueError, KeyError, tarfile.TarError) as error:
+        for tmp in extracted.values():
+            if os.path.isfile(tmp):
+                os.unlink(tmp)
+        rich.print(f"[red]Invalid cache bundle {path}[/red]: {error}")
+        sys.exit(1)
+
+    # Move all the files into the cache
+    for name, tmp in extracted.items():
+        mtime = manifest["files"][name]["mtime"]
+        os.utime(tmp, ns=(mtime, mtime))
+        os.replace(tmp, os.path.join(ska.PATH_CACHE, name))
+
+    # Forget what was loaded from the previous files
+    global _REFERENCE_FLUXES
+    with _REFERENCE_LOCK:
+        _REFERENCE_FLUXES = None
+    if "ska.filter" in sys.modules:
+        ska.Filter.clear_registry()
+    if "ska.colors" in sys.modules:
+        ska.colors._filter_bank.cache_clear()
+
+    return manifest
+
+
+def _add_to_tar(tar, name, content):
+    """Add a file to a tar archive, from its content"""
+    info = tarfile.TarInfo(name)
+    info.size = len(content)
+    info.mtime = int(time.time())
+    info.mode = 0o644
+    tar.addfile(info, io.BytesIO(content))
+
+
+# --------------------------------------------------------------------------------
+# Cache management for fluxes of reference spectra
+def array_checksum(*arrays):
+    """Checksum of the content of arrays.
+
+    Parameters
+    ----------
+    *arrays : np.ndarray
+        The arrays, converted to float64
+
+    Returns
+    -------
+    str
+        The SHA1 digest of the arrays
+    """
+    sha = hashlib.sha1()
+    for arr in arrays:
+        sha.update(np.ascontiguousarray(arr, dtype=float).tobytes())
+    return sha.hexdigest()
+
+
+def file_checksum(path):
+    """Checksum of a file, computed once per version of the file.
+
+    Parameters
+    ----------
+    path : str
+        The path to the file
+
+    Returns
+    -------
+    str
+        The SHA1 digest of the file
+    """
+    stat = os.stat(path)
+    key = (path, stat.st_size, stat.st_mtime_ns)
+    ska.profiling.lookup("cache.file_checksum", key in _FILE_CHECKSUMS)
+    if key not in _FILE_CHECKSUMS:
+        with open(path, "rb") as file:
+            _FILE_CHECKSUMS[key] = hashlib.sha1(file.read()).hexdigest()
+    return _FILE_CHECKSUMS[key]
+
+
+def _load_reference_fluxes():
+    """Read the cached fluxes of reference spectra (once per process)"""
+    global _REFERENCE_FLUXES
+
+    if _REFERENCE_FLUXES is None:
+        try:
+            with open(ska.PATH_REFERENCE_FLUXES, "r") as file:
+                _REFERENCE_FLUXES = json.load(file)
+        except (OSError, ValueError):
+            _REFERENCE_FLUXES = {}
+    return _REFERENCE_FLUXES
+
+
+def _save_reference_fluxes(fluxes):
+    """Merge fluxes into the cache file, written atomically"""
+    try:
+        with open(ska.PATH_REFERENCE_FLUXES, "r") as file:
+            merged = json.load(file)
+    except (OSError, ValueError):
+        merged = {}
+    merged.update(fluxes)
+
+    try:
+        ensure_cache()
+        tmp = f"{ska.PATH_REFERENCE_FLUXES}.{os.getpid()}.tmp"
+        with open(tmp, "w") as file:
+            json.dump(merged, file)
+        os.replace(tmp, ska.PATH_REFERENCE_FLUXES)
+    except OSError:
+        # Read-only cache: fluxes are kept in memory only
+        pass
+
+
+def reference_flux(filter, spectrum=None):
+    """Flux of a reference spectrum in a filter, computed once and cached on disk.
+
+    The cache key is made of the filter ID and the checksums of the filter
+    transmission and of the reference spectrum, together with the
+    integration settings.
+
+    Parameters
+    ----------
+    filter : ska.Filter
+        The filter
+
+    spectrum : ska.Spectrum
+        The reference spectrum (default=None, the cached spectrum of Vega)
+
+    Returns
+    -------
+    float
+        The mean flux density of the reference spectrum in the filter
+    """
+    return float(reference_fluxes([filter], spectrum)[0])
+
+
+def reference_fluxes(filters, spectrum=None):
+    """Fluxes of a reference spectrum in many filters, computed once and cached on disk.
+
+    The fluxes missing from the cache are computed, and the cache file is
+    written once for all of them.
+
+    Parameters
+    ----------
+    filters : list of ska.Filter
+        The filters
+
+    spectrum : ska.Spectrum
+        The reference spectrum (default=None, the cached spectrum of Vega)
+
+    Returns
+    -------
+    np.ndarray
+        The mean flux densities of the reference spectrum in the filters
+    """
+
+    # Checksum of the reference spectrum
+    if spectrum is None:
+        ensure_sun_and_vega()
+        checksum = file_checksum(ska.PATH_VEGA)
+    else:
+        checksum = array_checksum(spectrum.wave, spectrum.flux)
+
+    keys = [
+        "|".join(
+            [
+                filter.id,
+                filter.checksum,
+                checksum,
+                f"detector={int(filter.photon_counter)}",
+                f"method={ska.filter.INTEGRATION_METHOD}",
+                f"step={ska.filter.INTEGRATION_STEP}",
+            ]
+        )
+        for filter in filters
+    ]
+
+    with _REFERENCE_LOCK:
+        fluxes = _load_reference_fluxes()
+        result = [fluxes.get(key) for key in keys]
+    for value in result:
+        ska.profiling.lookup("cache.reference_flux", value is not None)
+
+    # Integrate the reference spectrum through the missing filters
+    missing = {}
+    for i, (filter, key) in enumerate(zip(filters, keys)):
+        if result[i] is None:
+            if spectrum is None:
+                spectrum = ska.Spectrum(ska.PATH_VEGA)
+            if key not in missing:
+                missing[key] = float(filter.compute_flux(spectrum))
+            result[i] = missing[key]
+
+    if missing:
+        with _REFERENCE_LOCK:
+            fluxes.update(missing)
+            _save_reference_fluxes(missing)
+    return np.array(result, dtype=float)
+
+
+def clear_reference_fluxes():
+    """Remove the cached fluxes of reference spectra"""
+    global _REFERENCE_FLUXES
+
+    with _REFERENCE_LOCK:
+        _REFERENCE_FLUXES = None
+        if os.path.isfile(ska.PATH_REFERENCE_FLUXES):
+            os.unlink(ska.PATH_REFERENCE_FLUXES)
 
 
 # --------------------------------------------------------------------------------
@@ -98,16 +589,24 @@ def clear_spectra():
     for f in cached_templates:
         os.unlink(os.path.join(ska.PATH_CACHE, f))
 
+    # Remove their binary spectrum files
+    for f in glob.glob(os.path.join(ska.PATH_CACHE, "*" + ska.store.SUFFIX)):
+        os.unlink(f)
+    ska.store.clear_sidecars()
+
 
+@ska.profiling.timed("cache.download")
 def download_sun_and_vega():
     """Download the spectra of the Sun and Vega"""
 
     try:
+        ensure_cache()
 
         # Get the spectrum of the Sun
         r = requests.get(
             "https://raw.githubusercontent.com/bcarry/ska/main/data/e490_sun.csv"
         )
+        ska.profiling.count("cache.bytes_downloaded", len(r.content))
         with open(ska.PATH_SUN, "w") as file:
             file.write(r.text)
 
@@ -115,7 +614,7 @@ def download_sun_and_vega():
         r = requests.get(
             "https://raw.githubusercontent.com/bcarry/ska/main/data/vega_stis.csv"
         )
-
+        ska.profiling.count("cache.bytes_downloaded", len(r.content))
         with open(ska.PATH_VEGA, "w") as file:
             file.write(r.text)
 
@@ -125,15 +624,18 @@ def download_sun_and_vega():
         return False
 
 
+@ska.profiling.timed("cache.download")
 def download_mahlke_taxonomy():
     """Download the template spectra of Mahlke+2022 taxonomy"""
 
     try:
+        ensure_cache()
 
         # Get the spectrum of the Sun
         r = requests.get(
             "https://raw.githubusercontent.com/bcarry/ska/main/data/template_mahlke2022.csv"
         )
+        ska.profiling.count("cache.bytes_downloaded", len(r.content))
         with open(ska.PATH_MAHLKE, "w") as file:
             file.write(r.text)
 
@@ -7,12 +7,37 @@ import rich
 import ska
 
 
+# --------------------------------------------------------------------------------
+class DefaultGroup(click.Group):
+    """Group of commands running a default command when no command is given"""
+
+    def __init__(self, *args, default=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.default = default
+
+    def parse_args(self, ctx, args):
+        if args and args[0] not in self.commands and not args[0].startswith("-"):
+            args.insert(0, self.default)
+        return super().parse_args(ctx, args)
+
+
 # --------------------------------------------------------------------------------
 @click.group()
 @click.version_option(version=ska.__version__, message="%(version)s")
-def cli_ska():
+@click.option(
+    "--profile",
+    is_flag=True,
+    help="Print the time spent in each stage, and cache hits, at exit.",
+)
+@click.option(
+    "--profile-output",
+    type=click.Path(dir_okay=False),
+    help="Write the profile to a JSON file at exit (implies --profile).",
+)
+def cli_ska(profile, profile_output):
     """CLI for Spectral-Kit for Asteroids."""
-    pass
+    if profile or profile_output:
+        ska.profiling.enable(profile_output or "table")
 
 
 # --------------------------------------------------------------------------------
@@ -37,7 +62,10 @@ def docs():
 @click.option(
     "--update", "-u", help="Update cached filters and filter list.", is_flag=True
 )
-def status(clear, update):
+@click.option(
+    "--jobs", "-j", default=8, show_default=True, help="Number of concurrent downloads"
+)
+def status(clear, update, jobs):
     """Echo the status of the cached filters."""
     from rich import prompt
 
@@ -83,7 +111,9 @@ def status(clear, update):
         elif update or decision == "2":
             rich.print(cached_filter_ids)
             rich.print("\nDownload filters from SVO Filter Service..")
-            cache.update_filters(cached_filter_ids, force=True)
+            report = cache.update_filters(cached_filter_ids, force=True, jobs=jobs)
+            n_ok = sum(error is None for error in report.values())
+            rich.print(f"{n_ok}/{len(report)} filters updated")
 
     # Spectra: Update or clear
     if cached_spectra or cached_templates:
@@ -110,11 +140,119 @@ def status(clear, update):
             cache.download_mahlke_taxonomy()
 
 
+# --------------------------------------------------------------------------------
+# Portable bundles of the cache
+@cli_ska.group(name="cache")
+def cache_group():
+    """Export, import or clear the cache."""
+    pass
+
+
+@cache_group.command(name="export")
+@click.argument("bundle", type=click.Path(dir_okay=False))
+@click.option(
+    "--filter",
+    "-f",
+    "patterns",
+    multiple=True,
+    help="Filter ID, facility or glob to pack (repeatable, default: all cached filters)",
+)
+@click.option(
+    "--jobs", "-j", default=8, show_default=True, help="Number of concurrent downloads"
+)
+def cache_export(bundle, patterns, jobs):
+    """Pack filters, spectra and templates into the BUNDLE archive."""
+    from ska import cache
+
+    ids = cache.select_filters(patterns) if patterns else None
+    manifest = cache.export_bundle(bundle, ids=ids, jobs=jobs)
+
+    size = sum(f["size"] for f in manifest["files"].values())
+    rich.print(
+        f"{len(manifest['filters'])} filters, {len(manifest['files'])} files "
+        f"({size / 1e6:.1f} MB) packed into [green]{bundle}[/green]"
+    )
+
+
+@cache_group.command(name="import")
+@click.argument("bundle", type=click.Path(exists=True, dir_okay=False))
+def cache_import(bundle):
+    """Unpack the BUNDLE archive into the cache."""
+    from ska import cache
+
+    manifest = cache.import_bundle(bundle)
+    rich.print(
+        f"{len(manifest['filters'])} filters, {len(manifest['files'])} files "
+        f"unpacked into [green]{ska.PATH_CACHE}[/green]"
+    )
+
+
+@cache_group.command(name="clear-csv")
+def cache_clear_csv():
+    """Remove the parsed copies of CSV spectra from the cache."""
+    from ska import store
+
+    count = store.clear_sidecars()
+    rich.print(
+        f"{count} parsed CSV spectra removed from "
+        f"[green]{os.path.join(ska.PATH_CACHE, 'csv')}[/green]"
+    )
+
+
+# --------------------------------------------------------------------------------
+# Binary spectrum files
+@cli_ska.group(name="spectrum")
+def spectrum_group():
+    """Convert spectra into binary files for fast loading."""
+    pass
+
+
+@spectrum_group.command(name="convert")
+@click.argument("files", nargs=-1, type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--output",
+    "-o",
+    default=None,
+    type=click.Path(dir_okay=False),
+    help="Binary file to write (single input only, default: FILE.skaspec)",
+)
+@click.option(
+    "--cache",
+    "cached",
+    is_flag=True,
+    help="Convert the cached spectra and templates",
+)
+def spectrum_convert(files, output, cached):
+    """Convert CSV spectra FILES into memory-mapped binary files (.skaspec)."""
+    from ska import cache, store
+
+    files = list(files)
+    if cached:
+        spectra, templates = cache.spectra_inventory()
+        files += sorted(spectra | templates)
+
+    if output is not None and len(files) != 1:
+        rich.print("[red]--output requires a single input file.[/red]")
+        sys.exit(1)
+
+    for file in files:
+        try:
+            path = store.convert(file, output)
+        except Exception as error:
+            rich.print(f"[red]Cannot convert {file}: {error}[/red]")
+            sys.exit(1)
+        rich.print(f"{file} -> [green]{path}[/green]")
+
+
 # --------------------------------------------------------------------------------
 # Fuzzy search among filters ID
 @cli_ska.command()
-def id():
-    """Fuzzy-search SVO filter index."""
+@click.argument("prefix", required=False, default="")
+def id(prefix):
+    """Fuzzy-search SVO filter index.
+
+    Only the IDs starting with PREFIX are proposed (e.g. SLOAN/SDSS.)
+    """
 
     import shutil
     import subprocess
@@ -137,7 +275,8 @@ def id():
         stderr=None,
     )
 
-    FILTERS = ska.svo.load_filter_list()
+    INDEX = ska.svo.filter_index()
+    FILTERS = INDEX.startswith(prefix) if prefix else INDEX
     for filter in FILTERS:
         line = filter.encode(sys.getdefaultencoding()) + b"\n"
         process.stdin.write(line)
@@ -150,7 +289,7 @@ def id():
     # Extract selected line
     try:
         choice = [line for line in process.stdout][0].decode()
-        filt = ska.Filter(choice.strip())
+        filt = ska.Filter.get(choice.strip())
         filt.display_summary()
 
     except IndexError:  # no choice was made, c-c c-c
@@ -162,8 +301,15 @@ def id():
 # Color computation
 @cli_ska.command()
 @click.argument("file")
-@click.argument("filter1")
-@click.argument("filter2")
+@click.argument("filter1", required=False)
+@click.argument("filter2", required=False)
+@click.option(
+    "--pair",
+    "-p",
+    nargs=2,
+    multiple=True,
+    help="Pair of filters, can be repeated (in addition to FILTER1 FILTER2)",
+)
 @click.option(
     "--phot_sys", default="Vega", help="Photometric system: Vega (default) | ST | AB"
 )
@@ -174,63 +320,266 @@ def id():
     default=False,
     help="Multiply the input reflectance by Solar spectrum.",
 )
-def color(file, filter1, filter2, phot_sys, reflectance):
-    """Compute the color between two filters"""
+@click.option(
+    "--jobs", "-j", default=1, show_default=True, help="Number of worker processes"
+)
+@click.option(
+    "--output",
+    "-o",
+    default=None,
+    help="Table of results (.csv or .parquet), printed as CSV if not provided",
+)
+def color(file, filter1, filter2, pair, phot_sys, reflectance, jobs, output):
+    """Compute the color between two filters
 
-    import pandas as pd
+    FILE is a spectrum, a glob pattern (quoted), a directory of CSV files, or
+    @MANIFEST, a text file listing one spectrum per line.
+    """
 
-    # TBD: interactive selection filters with fzf
+    from ska import batch
 
-    # Load filters
-    f_1 = ska.Filter(filter1)
-    f_2 = ska.Filter(filter2)
+    # TBD: interactive selection filters with fzf
 
-    # Read spectrum
-    spectrum = ska.Spectrum(file)
+    # Filter pairs
+    pairs = list(pair)
+    if filter1 is not None and filter2 is not None:
+        pairs.insert(0, (filter1, filter2))
+    elif filter1 is not None:
+        rich.print("[red]Provide two filters, or pairs of filters with --pair.[/red]")
+        sys.exit(1)
+    if not pairs:
+        rich.print("[red]No pair of filters provided.[/red]")
+        sys.exit(1)
+
+    files = batch.resolve_inputs(file)
+    if not files:
+        rich.print(f"[red]No spectrum found for {file}.[/red]")
+        sys.exit(1)
+
+    # Single color
+    if len(files) == 1 and len(pairs) == 1 and output is None:
+        # Load filters
+        f_1 = ska.Filter.get(pairs[0][0])
+        f_2 = ska.Filter.get(pairs[0][1])
+
+        # Read spectrum
+        spectrum = ska.Spectrum(files[0])
+
+        # Compute color
+        if reflectance:
+            color = spectrum.reflectance_to_color(f_1, f_2, phot_sys=phot_sys)
+        else:
+            color = spectrum.compute_color(f_1, f_2, phot_sys=phot_sys)
+        click.echo(f"{color:4.2f}")
+        return
+
+    # Table of colors, one row per file and pair
+    ids = sorted({id for p in pairs for id in p})
+    ska.cache.warm_filters(ids)
+    for id in ids:
+        ska.Filter.get(id)  # exits on unknown IDs or failed downloads
+    table = batch.color_table(
+        files, pairs, phot_sys=phot_sys, reflectance=reflectance, jobs=jobs
+    )
 
-    # Compute color
-    if reflectance:
-        color = spectrum.reflectance_to_color(f_1, f_2, phot_sys=phot_sys)
-        # color = skatools.reflectance_to_color(spectrum, f_1, f_2, phot_sys=phot_sys)
+    if output is None:
+        click.echo(table.to_csv(index=False), nl=False)
     else:
-        color = spectrum.compute_color(f_1, f_2, phot_sys=phot_sys)
-        # color = skatools.compute_color(spectrum, f_1, f_2, phot_sys=phot_sys)
-    click.echo(f"{color:4.2f}")
+        try:
+            batch.write_table(table, output)
+        except ImportError as error:
+            rich.print(f"[red]Cannot write {output}: {error}[/red]")
+            sys.exit(1)
+
+    # Report the spectra that could not be processed
+    failed = table.drop_duplicates("file").dropna(subset=["error"])
+    for _, row in failed.iterrows():
+        click.echo(f"{row.file}: {row.error}", err=True)
+
+
+# --------------------------------------------------------------------------------
+# Streaming color computation
+@cli_ska.command()
+@click.option(
+    "--pair",
+    "-p",
+    nargs=2,
+    multiple=True,
+    required=True,
+    help="Pair of filters, can be repeated",
+)
+@click.option(
+    "--phot_sys", default="Vega", help="Photometric system: Vega (default) | ST | AB"
+)
+@click.option(
+    "--batch-size",
+    "-b",
+    default=1,
+    show_default=True,
+    help="Maximum number of spectra computed together",
+)
+@click.option(
+    "--window",
+    "-w",
+    default=0.0,
+    show_default=True,
+    help="Maximum time (s) waiting for a batch to fill up",
+)
+def stream(pair, phot_sys, batch_size, window):
+    """Compute colors of spectra streamed on stdin
+
+    Each input line is a JSON record with an id, a wavelength array (micron),
+    and a flux or a reflectance array. Each output line is a JSON record with
+    the id and the colors, written as soon as they are computed.
+    """
+
+    from ska import batch
+
+    batch.stream_colors(
+        sys.stdin,
+        sys.stdout,
+        list(pair),
+        phot_sys=phot_sys,
+        batch_size=batch_size,
+        window=window,
+    )
 
 
 # --------------------------------------------------------------------------------
 # Solar Colors
 @cli_ska.command()
-@click.argument("filter1")
-@click.argument("filter2")
+@click.argument("filters", nargs=-1, required=True)
 @click.option(
     "--phot_sys",
     default="Vega",
     help="Photometric system ([green]Vega[/green] | ST | AB)",
 )
-def solarcolor(filter1, filter2, phot_sys):
-    """Compute the color of the Sun between two filters"""
+@click.option(
+    "--matrix",
+    "-m",
+    is_flag=True,
+    help="Colors between all pairs of FILTERS (IDs, facilities or globs)",
+)
+@click.option("--output", "-o", default=None, help="CSV file for the matrix of colors")
+def solarcolor(filters, phot_sys, matrix, output):
+    """Compute the color of the Sun between two filters
+
+    With --matrix, compute the colors between all pairs of FILTERS.
+    """
+
+    if not matrix:
+        if len(filters) != 2:
+            rich.print("[red]Provide two filters, or use --matrix.[/red]")
+            sys.exit(1)
+
+        # Load filters
+        f_1 = ska.Filter.get(filters[0])
+        f_2 = ska.Filter.get(filters[1])
+
+        # Compute color
+        color = f_1.solar_color(f_2, phot_sys=phot_sys)
+        click.echo(f"{color:4.2f}")
+        return
+
+    # Filters given by ID, facility or glob, in the order provided
+    index = ska.svo.filter_index()
+    ids = []
+    for f in filters:
+        ids += [f] if f in index else ska.cache.select_filters([f])
+    ids = list(dict.fromkeys(ids))
+    ska.cache.warm_filters(ids)
+
+    colors = ska.solar_colors(ids, phot_sys=phot_sys)
 
-    # Load filters
-    f_1 = ska.Filter(filter1)
-    f_2 = ska.Filter(filter2)
+    if output is not None:
+        colors.to_csv(output, float_format="%.4f")
+        return
 
-    # Compute color
-    color = f_1.solar_color(f_2, phot_sys=phot_sys)
-    click.echo(f"{color:4.2f}")
+    from rich.table import Table
+
+    table = Table("", *colors.columns)
+    for id, row in colors.iterrows():
+        table.add_row(id, *[f"{c:.2f}" for c in row])
+    rich.print(table)
 
 
 # --------------------------------------------------------------------------------
 # Filter basic information
-@cli_ska.command()
+@cli_ska.group(cls=DefaultGroup, default="show")
+def filter():
+    """Display the basic properties of the filter, or search filters"""
+    pass
+
+
+@filter.command(name="show")
 @click.argument("filter")
-def filter(filter):
+def filter_show(filter):
     """Display the basic properties of the filter"""
 
-    f = ska.Filter(filter)
+    f = ska.Filter.get(filter)
     f.display_summary()
 
 
+@filter.command(name="search")
+@click.option("--facility", default=None, help="Facility (e.g. LSST)")
+@click.option("--instrument", default=None, help="Instrument")
+@click.option("--band", default=None, help="Band")
+@click.option(
+    "--pivot",
+    nargs=2,
+    type=float,
+    default=None,
+    help="Range of pivot wavelength (micron), e.g. --pivot 0.5 0.7",
+)
+@click.option(
+    "--central",
+    nargs=2,
+    type=float,
+    default=None,
+    help="Range of central wavelength (micron)",
+)
+@click.option(
+    "--fwhm", nargs=2, type=float, default=None, help="Range of FWHM (micron)"
+)
+@click.option(
+    "--detector",
+    type=click.Choice(["photon", "energy"]),
+    default=None,
+    help="Detector type",
+)
+@click.option(
+    "--limit", "-n", default=50, show_default=True, help="Maximum number of filters"
+)
+def filter_search(facility, instrument, band, pivot, central, fwhm, detector, limit):
+    """Search the local catalogue of SVO filters"""
+    from rich.table import Table
+
+    results = ska.svo.search_filters(
+        facility=facility,
+        instrument=instrument,
+        band=band,
+        pivot=pivot,
+        central=central,
+        fwhm=fwhm,
+        detector_type=None if detector is None else int(detector == "photon"),
+        limit=limit,
+    )
+    results = results.astype(object).where(results.notna(), None)
+
+    table = Table("ID", "Facility", "Instrument", "Band", "Pivot λ", "FWHM")
+    for row in results.itertuples():
+        table.add_row(
+            row.id,
+            row.facility or "",
+            row.instrument or "",
+            row.band or "",
+            "" if row.pivot_wavelength is None else f"{row.pivot_wavelength:.3f}",
+            "" if row.fwhm is None else f"{row.fwhm:.3f}",
+        )
+    rich.print(table)
+    rich.print(f"{len(results)} filters (micron)")
+
+
 # --------------------------------------------------------------------------------
 # Plot filter transmission
 @cli_ska.command()
@@ -242,7 +591,7 @@ def filter(filter):
 def plot_filter(filter, figure, black):
     """Display a simple figure of the transmission of the filter"""
 
-    f = ska.Filter(filter)
+    f = ska.Filter.get(filter)
 
     import matplotlib.pyplot as plt
 
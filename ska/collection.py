@@ -0,0 +1,248 @@
+import glob
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+import rich
+import ska
+
+
+class SpectrumCollection:
+    # --------------------------------------------------------------------------------
+    def __init__(self, wave, flux, offsets=None, ids=None, is_refl=False):
+        """Initiate a SKA collection of spectra stored in contiguous arrays
+
+        Spectra sharing a wavelength grid are stored as a dense block: wave is
+        the (n_wave,) grid and flux the (n_spectra, n_wave) fluxes. Otherwise,
+        spectra are stored in a ragged (CSR-like) layout: wave and flux are the
+        concatenated samples of all spectra, and spectrum i spans the samples
+        offsets[i] to offsets[i + 1].
+
+        Parameters
+        ----------
+        wave : np.ndarray
+            The wavelength (micron), sorted within each spectrum
+
+        flux : np.ndarray
+            The flux or reflectance
+
+        offsets : np.ndarray
+            The (n_spectra + 1,) offsets of the spectra in the ragged layout
+            (default=None, dense layout)
+
+        ids : list
+            The identifiers of the spectra (default=None, their index)
+
+        is_refl : boolean
+            Set True if the spectra are reflectance spectra (default=False)
+        """
+
+        # Store attributes
+        self.wave = np.asarray(wave, dtype=float)
+        self.flux = np.asarray(flux, dtype=float)
+        self.offsets = None if offsets is None else np.asarray(offsets, dtype=int)
+        self.is_refl = is_refl
+
+        if self.offsets is None:
+            self.flux = np.atleast_2d(self.flux)
+            n_spectra = self.flux.shape[0]
+        else:
+            n_spectra = len(self.offsets) - 1
+
+        self.ids = list(range(n_spectra)) if ids is None else list(ids)
+
+    # --------------------------------------------------------------------------------
+    def __len__(self):
+        return len(self.ids)
+
+    # --------------------------------------------------------------------------------
+    def __getitem__(self, i):
+        """A SKA Spectrum viewing the arrays of the i-th spectrum"""
+        spectrum = ska.Spectrum()
+        spectrum.wave, spectrum.flux = self.arrays(i)
+        spectrum.is_refl = self.is_refl
+        return spectrum
+
+    # --------------------------------------------------------------------------------
+    @property
+    def is_dense(self):
+        """True if all the spectra share a single wavelength grid"""
+        return self.offsets is None
+
+    # --------------------------------------------------------------------------------
+    def arrays(self, i):
+        """The wavelength and flux arrays of the i-th spectrum (views, no copy)
+
+        Parameters
+        ----------
+        i : int
+            The index of the spectrum
+
+        Returns
+        -------
+        np.ndarray, np.ndarray
+            The wavelength and flux
+        """
+        if self.is_dense:
+            return self.wave, self.flux[i]
+
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.wave[start:end], self.flux[start:end]
+
+    # --------------------------------------------------------------------------------
+    # --------------------------------------------------------------------------------
+    # --------------------------------------------------------------------------------
+    # Collection from Input
+
+    # --------------------------------------------------------------------------------
+    @classmethod
+    def from_arrays(cls, waves, fluxes, ids=None, is_refl=False):
+        """Create a SKA collection from lists of wavelength and flux arrays.
+
+        A dense block is used if all the spectra share the same wavelength.
+
+        Parameters
+        ----------
+        waves : list of np.ndarray
+            The sorted wavelength (micron) of each spectrum
+
+        fluxes : list of np.ndarray
+            The flux or reflectance of each spectrum
+
+        ids : list
+            The identifiers of the spectra (default=None, their index)
+
+        is_refl : boolean
+            Set True if the spectra are reflectance spectra (default=False)
+
+        Returns
+        -------
+        ska.SpectrumCollection
+            The collection
+        """
+
+        if len(waves) and all(np.array_equal(waves[0], w) for w in waves[1:]):
+            return cls(waves[0], np.vstack(fluxes), ids=ids, is_refl=is_refl)
+
+        offsets = np.zeros(len(waves) + 1, dtype=int)
+        offsets[1:] = np.cumsum([len(w) for w in waves])
+        return cls(
+            np.concatenate(waves),
+            np.concatenate(fluxes),
+            offsets=offsets,
+            ids=ids,
+            is_refl=is_refl,
+        )
+
+    # --------------------------------------------------------------------------------
+    @classmethod
+    def from_spectra(cls, spectra, ids=None):
+        """Create a SKA collection from SKA Spectrum objects.
+
+        Parameters
+        ----------
+        spectra : list of ska.Spectrum
+            The spectra, either all flux or all reflectance spectra
+
+        ids : list
+            The identifiers of the spectra (default=None, their index)
+
+        Returns
+        -------
+        ska.SpectrumCollection
+            The collection
+        """
+
+        is_refl = {s.is_refl for s in spectra}
+        if len(is_refl) > 1:
+            rich.print(f"[red]Cannot mix flux and reflectance spectra.[/red]")
+            sys.exit(1)
+
+        return cls.from_arrays(
+            [s.wave for s in spectra],
+            [s.flux for s in spectra],
+            ids=ids,
+            is_refl=is_refl.pop() if is_refl else False,
+        )
+
+    # --------------------------------------------------------------------------------
+    @classmethod
+    def from_directory(cls, path, pattern="*.csv"):
+        """Create a SKA collection from a directory of CSV files.
+
+        Each file must have a Wavelength (micron) column, and either a Flux or
+        a Reflectance column. The spectra are identified by their file name.
+
+        Parameters
+        ----------
+        path : str
+            The directory
+
+        pattern : str
+            The pattern of the file names (default=*.csv)
+
+        Returns
+        -------
+        ska.SpectrumCollection
+            The collection
+        """
+
+        files = sorted(glob.glob(os.path.join(path, pattern)))
+        if not files:
+            rich.print(f"[red]No spectrum matching {pattern} in {path}.[/red]")
+            sys.exit(1)
+
+        spectra = [ska.Spectrum(f) for f in files]
+        return cls.from_spectra(spectra, ids=[os.path.basename(f) for f in files])
+
+    # --------------------------------------------------------------------------------
+    @classmethod
+    def from_table(cls, table, id_column="ID"):
+        """Create a SKA collection from a long-format table.
+
+        The table has one row per sample, with an identifier, a Wavelength
+        (micron), and either a Flux or a Reflectance column.
+
+        Parameters
+        ----------
+        table : pd.DataFrame or str
+            The table, or the path to a CSV file containing it
+
+        id_column : str
+            The name of the column identifying the spectra (default=ID)
+
+        Returns
+        -------
+        ska.SpectrumCollection
+            The collection
+        """
+
+        if isinstance(table, str):
+            table = pd.read_csv(table)
+
+        for col in [id_column, "Wavelength"]:
+            if col not in table.columns:
+                rich.print(f"[red]Column '{col}' missing from input.[/red]")
+                sys.exit(1)
+
+        if "Flux" in table.columns:
+            values, is_refl = table["Flux"], False
+        elif "Reflectance" in table.columns:
+            values, is_refl = table["Reflectance"], True
+        else:
+            rich.print(f"[red]Column 'Flux' or 'Reflectance' missing from input.[/red]")
+            sys.exit(1)
+
+        # Group samples by spectrum, in order of first appearance, then sort
+        codes, ids = pd.factorize(table[id_column], sort=False)
+        wave = table["Wavelength"].to_numpy(dtype=float)
+        order = np.lexsort((wave, codes))
+
+        offsets = np.zeros(len(ids) + 1, dtype=int)
+        offsets[1:] = np.cumsum(np.bincount(codes, minlength=len(ids)))
+
+        waves = np.split(wave[order], offsets[1:-1])
+        fluxes = np.split(values.to_numpy(dtype=float)[order], offsets[1:-1])
+        return cls.from_arrays(waves, fluxes, ids=list(ids), is_refl=is_refl)
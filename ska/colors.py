@@ -0,0 +1,287 @@
+import functools
+import sys
+
+import numpy as np
+import pandas as pd
+
+import rich
+import ska
+
+# Maximum number of samples (realizations x wavelengths) drawn at once by
+# monte_carlo_colors, bounding its memory use (64 MB of float64)
+MONTE_CARLO_CHUNK = 2**23
+
+
+# --------------------------------------------------------------------------------
+def compute_colors(
+    spectra, pairs, phot_sys="Vega", reflectance=False, vega=None, sun=None
+):
+    """Computes the colors of many spectra in many pairs of filters.
+
+    The responses of the filters are computed once in a ska.FilterBank and
+    projected onto the wavelength grid of the spectra, so that the fluxes of
+    all the spectra sharing a grid are obtained with a single matrix product.
+
+    Parameters
+    ==========
+    spectra : ska.Spectrum, list of ska.Spectrum, ska.SpectrumCollection or tuple
+        The spectra, either as a single Spectrum, a list of SKA Spectrum
+        objects, a SpectrumCollection, or as a (wave, flux) tuple with a 1D
+        wavelength grid (in micron) and a 2D array of fluxes with one spectrum
+        per row.
+
+    pairs : list of tuple
+        The pairs of filters (filter_1, filter_2), each a SKA Filter object
+        or a filter unique ID (see SVO filter service)
+
+    phot_sys : str
+        Photometric system in which to report the colors (default=Vega)
+
+    reflectance : boolean
+        Set True to multiply the input reflectances by the Solar spectrum,
+        as done by ska.Spectrum.reflectance_to_color (default=False)
+
+    vega : ska.Spectrum
+        The spectrum of Vega (default=None, the cached spectrum of Vega)
+
+    sun : ska.Spectrum
+        The spectrum of the Sun (default=None, the cached spectrum of the Sun)
+
+    Returns
+    =======
+    np.ndarray
+        The (n_spectra, n_pairs) array of filter_1-filter_2 colors
+    """
+
+    bank, idx_1, idx_2 = _pairs_bank(pairs)
+
+    # Read spectrum of the Sun if not provided
+    if reflectance and not isinstance(sun, ska.Spectrum):
+        ska.cache.ensure_sun_and_vega()
+        sun = ska.Spectrum(ska.PATH_SUN)
+
+    # Fluxes of all spectra in all filters
+    fluxes = bank.compute_flux(spectra, sun=sun if reflectance else None)
+    fluxes = np.atleast_2d(fluxes)
+
+    # Colors in ST photometric system
+    colors = -2.5 * np.log10(fluxes[:, idx_1] / fluxes[:, idx_2])
+    return _to_phot_sys(colors, bank, idx_1, idx_2, phot_sys, vega)
+
+
+# --------------------------------------------------------------------------------
+def monte_carlo_colors(
+    spectrum,
+    pairs,
+    n_samples,
+    phot_sys="Vega",
+    reflectance=False,
+    vega=None,
+    sun=None,
+    seed=None,
+    chunk_size=None,
+):
+    """Computes the colors of random realizations of a spectrum within its errors.
+
+    Realizations are drawn from independent normal distributions at each
+    wavelength, centred on the flux with the error as standard deviation.
+    They are drawn in chunks of chunk_size realizations, each as a single
+    2D array whose colors are computed with a single matrix product. The
+    realizations only depend on the seed, not on the size of the chunks.
+
+    Parameters
+    ==========
+    spectrum : ska.Spectrum
+        The spectrum, with its error
+
+    pairs : list of tuple
+        The pairs of filters (filter_1, filter_2), each a SKA Filter object
+        or a filter unique ID (see SVO filter service)
+
+    n_samples : int
+        The number of realizations
+
+    phot_sys : str
+        Photometric system in which to report the colors (default=Vega)
+
+    reflectance : boolean
+        Set True to multiply the realizations by the Solar spectrum
+        (default=False)
+
+    vega : ska.Spectrum
+        The spectrum of Vega (default=None, the cached spectrum of Vega)
+
+    sun : ska.Spectrum
+        The spectrum of the Sun (default=None, the cached spectrum of the Sun)
+
+    seed : int or np.random.Generator
+        The seed of the realizations (default=None)
+
+    chunk_size : int
+        The number of realizations drawn at once (default=None, as many as
+        fit in MONTE_CARLO_CHUNK samples)
+
+    Returns
+    =======
+    np.ndarray
+        The (n_samples, n_pairs) array of filter_1-filter_2 colors
+    """
+
+    if spectrum.error is None:
+        rich.print("[red]The spectrum has no error to draw realizations from.[/red]")
+        sys.exit(1)
+
+    bank, idx_1, idx_2 = _pairs_bank(pairs)
+
+    # Read spectrum of the Sun if not provided
+    if reflectance and not isinstance(sun, ska.Spectrum):
+        ska.cache.ensure_sun_and_vega()
+        sun = ska.Spectrum(ska.PATH_SUN)
+
+    # Weights of the filters on the wavelength grid of the spectrum
+    weights = bank.project(spectrum.wave, sun=sun if reflectance else None).T
+
+    rng = np.random.default_rng(seed)
+    if chunk_size is None:
+        chunk_size = max(1, MONTE_CARLO_CHUNK // len(spectrum.wave))
+
+    colors = np.empty((n_samples, len(idx_1)))
+    for start in range(0, n_samples, chunk_size):
+        n = min(chunk_size, n_samples - start)
+        flux = rng.standard_normal((n, len(spectrum.wave)))
+        flux *= spectrum.error
+        flux += spectrum.flux
+        fluxes = flux @ weights
+        with np.errstate(divide="ignore", invalid="ignore"):
+            colors[start : start + n] = -2.5 * np.log10(
+                fluxes[:, idx_1] / fluxes[:, idx_2]
+            )
+
+    return _to_phot_sys(colors, bank, idx_1, idx_2, phot_sys, vega)
+
+
+# --------------------------------------------------------------------------------
+def summarize_samples(samples, percentiles=(16, 50, 84)):
+    """Summary statistics of the colors of random realizations.
+
+    Parameters
+    ==========
+    samples : np.ndarray
+        The colors of the realizations
+
+    percentiles : tuple
+        The percentiles to report (default=16, 50, 84)
+
+    Returns
+    =======
+    dict
+        The mean, the standard deviation (std), and the percentiles (a dict
+        by percentile) of the samples, ignoring NaN
+    """
+    values = np.nanpercentile(samples, percentiles)
+    return {
+        "mean": float(np.nanmean(samples)),
+        "std": float(np.nanstd(samples)),
+        "percentiles": {p: float(v) for p, v in zip(percentiles, values)},
+    }
+
+
+# --------------------------------------------------------------------------------
+def solar_colors(filters, phot_sys="Vega", vega=None):
+    """Computes the colors of the Sun between all the pairs of filters.
+
+    Colors are computed from the solar flux (Fsun) and the pivot wavelength
+    of each filter provided by the SVO Filter Service, and from the cached
+    fluxes of Vega, in a single pass over the filters.
+
+    Parameters
+    ==========
+    filters : list
+        The filters, each a SKA Filter object or a filter unique ID (see
+        SVO filter service)
+
+    phot_sys : str
+        Photometric system in which to report the colors (default=Vega)
+
+    vega : ska.Spectrum
+        The spectrum of Vega (default=None, the cached spectrum of Vega)
+
+    Returns
+    =======
+    pd.DataFrame
+        The (n_filters, n_filters) matrix of solar colors, indexed by filter
+        IDs: the row filter minus the column filter. Filters without a solar
+        flux give NaN.
+    """
+
+    ids = list(dict.fromkeys(_as_filter(f).id for f in filters))
+    bank = _filter_bank(tuple(ids), ska.filter.INTEGRATION_METHOD)
+
+    # Colors in ST photometric system
+    mags = -2.5 * np.log10(bank.solar_flux)
+    colors = mags[:, None] - mags[None, :]
+
+    # Magnitude in AB photometric system
+    if phot_sys == "AB":
+        pivots = np.log10(bank.pivot_wavelength)
+        colors -= 5 * (pivots[:, None] - pivots[None, :])
+
+    # Magnitude in Vega photometric system
+    elif phot_sys == "Vega":
+        if not isinstance(vega, ska.Spectrum):
+            vega = None
+        ref = -2.5 * np.log10(bank.reference_flux(vega))
+        colors -= ref[:, None] - ref[None, :]
+
+    return pd.DataFrame(colors, index=ids, columns=ids)
+
+
+# --------------------------------------------------------------------------------
+def _pairs_bank(pairs):
+    """FilterBank of the filters of pairs, and the rows of each filter of the pairs"""
+
+    # Load Filters if provided as strings
+    pairs = [tuple(_as_filter(f) for f in pair) for pair in pairs]
+    filters = list({f.id: f for pair in pairs for f in pair}.values())
+    column = {f.id: i for i, f in enumerate(filters)}
+
+    bank = _filter_bank(tuple(f.id for f in filters), ska.filter.INTEGRATION_METHOD)
+    idx_1 = np.array([column[f1.id] for f1, _ in pairs], dtype=int)
+    idx_2 = np.array([column[f2.id] for _, f2 in pairs], dtype=int)
+    return bank, idx_1, idx_2
+
+
+# --------------------------------------------------------------------------------
+def _to_phot_sys(colors, bank, idx_1, idx_2, phot_sys, vega=None):
+    """Convert colors from the ST photometric system"""
+
+    # Magnitude in AB photometric system
+    if phot_sys == "AB":
+        pivots = bank.pivot_wavelength
+        return colors - 5 * np.log10(pivots[idx_1] / pivots[idx_2])
+
+    # Magnitude in Vega photometric system
+    elif phot_sys == "Vega":
+        if not isinstance(vega, ska.Spectrum):
+            vega = None
+        ref = bank.reference_flux(vega)
+        return colors + 2.5 * np.log10(ref[idx_1] / ref[idx_2])
+
+    # Magnitude in ST photometric system
+    elif phot_sys == "ST":
+        return colors
+
+
+# --------------------------------------------------------------------------------
+def _as_filter(filter):
+    """Return a SKA Filter from a Filter or a filter unique ID"""
+    if isinstance(filter, ska.Filter):
+        return filter
+    return ska.Filter.get(filter)
+
+
+# --------------------------------------------------------------------------------
+@functools.lru_cache(maxsize=16)
+def _filter_bank(ids, method):
+    """Return a SKA FilterBank, built once per tuple of filter IDs and method"""
+    return ska.FilterBank(ids, method=method)
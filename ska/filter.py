@@ -1,5 +1,8 @@
+import asyncio
+import collections
 import os
 import sys
+import threading
 from astropy.io.votable import parse
 import numpy as np
 import pandas as pd
@@ -8,9 +11,34 @@ import rich
 
 import ska
 
+# Maximum number of Filter instances kept by Filter.get
+REGISTRY_SIZE = 256
+
+# Integration over filters: "exact" integrates the product of the piecewise
+# linear transmission and spectrum, "grid" resamples both on a regular grid
+INTEGRATION_METHOD = "exact"
+
+# Step of the wavelength grid used by the "grid" integration (micron)
+INTEGRATION_STEP = 0.0005
+
+# Weight the transmission of photon-counting filters (DetectorType 1) by the
+# wavelength. Set False, before computing any flux, to reproduce the fluxes of
+# ska 2.0, where all filters were integrated as energy counters
+PHOTON_COUNTING = True
+
+# Number of spectrum grids for which each filter keeps its weights
+WEIGHTS_PER_FILTER = 8
+
+_REGISTRY = collections.OrderedDict()
+_REGISTRY_LOCK = threading.Lock()
+
+# Guards the weights kept by each filter, shared between threads by Filter.get
+_WEIGHTS_LOCK = threading.Lock()
+
 
 class Filter:
     # --------------------------------------------------------------------------------
+    @ska.profiling.timed("filter.init")
     def __init__(self, id):
         """Initiate a SKA filter class
 
@@ -21,8 +49,7 @@ class Filter:
         """
 
         # Test validity of filters
-        FILTERS = ska.svo.load_filter_list()
-        if id not in FILTERS:
+        if id not in ska.svo.filter_index():
             rich.print(
                 f"[red]Unknown filter ID {id}[/red]. Use [green]ska filter[/green] command to list available filters"
             )
@@ -30,46 +57,132 @@ class Filter:
             # raise ValueError(f"Unknown filter ID {id}. Use [green]ska filter[/green] to list available filters")
 
         self.id = id
-        self.path = os.path.join(ska.PATH_CACHE, f"{self.id.replace('/','_')}.xml")
+        self.path = ska.svo.filter_path(self.id)
 
-        # Download if not cached
-        if not os.path.isfile(self.path):
-            ska.svo.download_filter(self.id)
+        # Read filter response from the binary sidecar of the VOTable
+        params, data = ska.svo.load_filter(self.id)
+        self._VOFilter = None
+        self._checksum = None
+        self._quadrature = None
+        self._weights = collections.OrderedDict()
 
-        # Parse filter response
-        self.VOFilter = parse(self.path)
-        data = pd.DataFrame(data=self.VOFilter.get_first_table().array.data)
+        # Store attributes
+        self.wave = data[0]
+        self.trans = data[1]
+        self.central_wavelength = params["WavelengthCen"] / 1e4
+        self.FWHM = params["FWHM"] / 1e4
+        self.pivot_wavelength = params["WavelengthPivot"] / 1e4
+        self.solar_flux = params["Fsun"]
+        self.facility = params["Facility"]
+        self.instrument = params["Instrument"]
+        self.band = params["Band"]
+
+        # Photon (1) or energy (0) counter
+        try:
+            self.detector_type = int(params["DetectorType"])
+        except (TypeError, ValueError):
+            self.detector_type = 0
 
-        # Select non-zero transmission and convert to micron
-        data = data[data.Transmission >= 1e-5]
-        data.Wavelength /= 1e4  # to micron
+    # --------------------------------------------------------------------------------
+    @property
+    def checksum(self):
+        """Checksum of the filter transmission"""
+        if self._checksum is None:
+            self._checksum = ska.cache.array_checksum(self.wave, self.trans)
+        return self._checksum
 
-        # Store attributes
-        self.id = id
-        self.wave = data.Wavelength
-        self.trans = data.Transmission
-        self.central_wavelength = (
-            self.VOFilter.get_field_by_id("WavelengthCen").value / 1e4
-        )
-        self.FWHM = self.VOFilter.get_field_by_id("FWHM").value / 1e4
-        self.pivot_wavelength = (
-            self.VOFilter.get_field_by_id("WavelengthPivot").value / 1e4
-        )
+    # --------------------------------------------------------------------------------
+    @property
+    def photon_counter(self):
+        """Whether the filter is integrated as a photon counter (see PHOTON_COUNTING)"""
+        return PHOTON_COUNTING and self.detector_type == 1
 
-        try:
-            self.facility = self.VOFilter.get_field_by_id("Facility").value
-        except:
-            self.facility = None
+    # --------------------------------------------------------------------------------
+    @property
+    def VOFilter(self):
+        """The filter VOTable, parsed on first access"""
+        if self._VOFilter is None:
+            with ska.profiling.stage("svo.parse_votable"):
+                self._VOFilter = parse(self.path)
+        return self._VOFilter
 
-        try:
-            self.instrument = self.VOFilter.get_field_by_id("Instrument").value
-        except:
-            self.instrument = None
+    # --------------------------------------------------------------------------------
+    @classmethod
+    def get(cls, id):
+        """Return the shared SKA filter for a given ID.
 
-        try:
-            self.band = self.VOFilter.get_field_by_id("Band").value
-        except:
-            self.band = None
+        Filters are built once and kept in a process-wide LRU registry of
+        ``REGISTRY_SIZE`` entries. The returned instance is shared between all
+        callers and must be treated as read-only.
+
+        Parameters
+        ----------
+        id : str
+            The filter unique ID (see `SVO Filter Service <http://svo2.cab.inta-csic.es/theory/fps`__)
+
+        Returns
+        -------
+        ska.Filter
+            The filter
+        """
+
+        with _REGISTRY_LOCK:
+            if id in _REGISTRY:
+                _REGISTRY.move_to_end(id)
+                ska.profiling.lookup("filter.registry", True)
+                return _REGISTRY[id]
+        ska.profiling.lookup("filter.registry", False)
+
+        # Build outside of the lock: parsing may download the filter
+        filt = cls(id)
+
+        with _REGISTRY_LOCK:
+            filt = _REGISTRY.setdefault(id, filt)
+            _REGISTRY.move_to_end(id)
+            while len(_REGISTRY) > REGISTRY_SIZE:
+                _REGISTRY.popitem(last=False)
+        return filt
+
+    # --------------------------------------------------------------------------------
+    @classmethod
+    async def aload(cls, id):
+        """Return the shared SKA filter for a given ID, without blocking the event loop.
+
+        The asyncio counterpart of Filter.get: the VOTable is downloaded with
+        ska.svo.afetch_filter if it is not cached, and the filter is built in
+        a worker thread. Concurrent calls for the same ID share the download.
+
+        Parameters
+        ----------
+        id : str
+            The filter unique ID (see `SVO Filter Service <http://svo2.cab.inta-csic.es/theory/fps`__)
+
+        Returns
+        -------
+        ska.Filter
+            The filter
+
+        Raises
+        ------
+        ValueError
+            If the filter ID is unknown
+        """
+
+        with _REGISTRY_LOCK:
+            if id in _REGISTRY:
+                _REGISTRY.move_to_end(id)
+                return _REGISTRY[id]
+
+        await ska.svo.afetch_filter(id)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(ska.svo._executor(), cls.get, id)
+
+    # --------------------------------------------------------------------------------
+    @staticmethod
+    def clear_registry():
+        """Remove all the filters from the registry used by Filter.get"""
+        with _REGISTRY_LOCK:
+            _REGISTRY.clear()
 
     # --------------------------------------------------------------------------------
     def display_summary(self):
@@ -109,7 +222,8 @@ class Filter:
         )
 
     # --------------------------------------------------------------------------------
-    def compute_flux(self, spectrum):
+    @ska.profiling.timed("filter.compute_flux")
+    def compute_flux(self, spectrum, method=None):
         """Computes the flux of a spectrum in a given band.
 
         Parameters
@@ -117,36 +231,176 @@ class Filter:
         spectrum : ska.Spectrum
             The spectrum to compute the flux of
 
+        method : str
+            The integration method, "exact" or "grid" (default=None, the
+            value of ska.filter.INTEGRATION_METHOD)
+
         Returns
         -------
         float
             The computed mean flux density
         """
 
-        # Wavelength range to integrate over
-        lambda_int = np.arange(self.wave.min(), self.wave.max(), 0.0005)
+        method = INTEGRATION_METHOD if method is None else method
+
+        # Weighted sum of the spectrum, with the weights of the filter
+        # projected once onto its wavelength grid
+        return self.weights(spectrum.wave, method) @ spectrum.flux
+
+    # --------------------------------------------------------------------------------
+    def weights(self, wave, method=None):
+        """Normalized weights of the filter on the wavelength grid of a spectrum.
+
+        The flux of a spectrum sampled on the grid is the dot product of its
+        samples with the weights. With the "exact" method, the product of the
+        transmission, the detector factor, and the spectrum, all linear between
+        the merged breakpoints of the filter and the spectrum, is integrated
+        exactly. With the "grid" method, the quadrature weights of the filter
+        are projected onto the grid.
+
+        Parameters
+        ----------
+        wave : np.ndarray
+            The sorted wavelength grid of the spectrum (micron)
+
+        method : str
+            The integration method, "exact" or "grid" (default=None, the
+            value of ska.filter.INTEGRATION_METHOD)
+
+        Returns
+        -------
+        np.ndarray
+            The weights, of same length as wave
+        """
+
+        method = INTEGRATION_METHOD if method is None else method
+        if method not in ["exact", "grid"]:
+            rich.print(f"[red]Unknown integration method {method}[/red].")
+            sys.exit(1)
+
+        # Weights computed once per grid: the spectrum interpolated on the
+        # integration grid (the breakpoints for "exact"), written as weights on wave
+        key = (method, ska.cache.array_checksum(wave))
+        with _WEIGHTS_LOCK:
+            cached = self._weights.get(key)
+            if cached is not None:
+                self._weights.move_to_end(key)
+        ska.profiling.lookup("filter.weights", cached is not None)
+        if cached is not None:
+            return cached
+
+        # Computed outside of the lock, other threads may use other grids
+        wave = np.asarray(wave, dtype=float)
+        with ska.profiling.stage("filter.integration"):
+            if method == "exact":
+                grid, weights = self.exact_quadrature(wave)
+            else:
+                grid, weights = self.quadrature()
+            plan = ska.interp.InterpolationPlan(wave, grid)
+            new = plan.transpose(weights)[0]
+        new.flags.writeable = False
+
+        with _WEIGHTS_LOCK:
+            new = self._weights.setdefault(key, new)
+            self._weights.move_to_end(key)
+            while len(self._weights) > WEIGHTS_PER_FILTER:
+                self._weights.popitem(last=False)
+        return new
+
+    # --------------------------------------------------------------------------------
+    def exact_quadrature(self, wave):
+        """Normalized weights of the filter on its breakpoints merged with a spectrum's.
+
+        This is the integration of the "exact" method. The transmission,
+        the detector factor (photon or energy counter), and the spectrum are
+        linear between the merged breakpoints, so that the integral of their
+        product on each interval is exact. The flux of a spectrum in the
+        filter is the sum of the spectrum interpolated on the breakpoints,
+        multiplied by the weights.
+
+        Parameters
+        ----------
+        wave : np.ndarray
+            The sorted wavelength grid of the spectrum (micron)
+
+        Returns
+        -------
+        np.ndarray, np.ndarray
+            The breakpoints (micron) and the weights
+        """
+
+        # Breakpoints of the transmission and of the spectrum
+        start = np.searchsorted(wave, self.wave[0], side="right")
+        end = np.searchsorted(wave, self.wave[-1], side="left")
+        breaks = np.union1d(self.wave, wave[start:end])
+        trans = np.interp(breaks, self.wave, self.trans)
 
         # Detector type
         # Photon counter
-        if self.VOFilter.get_field_by_id("DetectorType") == 1:
-            factor = lambda_int
+        if self.photon_counter:
+            factor = breaks
         # Energy counter
         else:
-            factor = lambda_int * 0 + 1
+            factor = np.ones_like(breaks)
 
-        # Interpolate over the transmission range
-        interpol_transmission = np.interp(lambda_int, self.wave, self.trans)
+        # Integral of the product of three linear functions on each interval:
+        # transmission, detector factor, and the hat function of each end
+        h = np.diff(breaks) / 12
+        t_a, t_b = trans[:-1], trans[1:]
+        f_a, f_b = factor[:-1], factor[1:]
+        cross = t_a * f_b + t_b * f_a
+        weights = np.zeros_like(breaks)
+        weights[:-1] += h * (3 * t_a * f_a + cross + t_b * f_b)
+        weights[1:] += h * (t_a * f_a + cross + 3 * t_b * f_b)
+        weights /= weights.sum()
 
-        interpol_spectrum = np.interp(lambda_int, spectrum.wave, spectrum.flux)
+        return breaks, weights
 
-        # Compute the flux by integrating over wavelength.
-        nom = np.trapz(
-            interpol_spectrum * interpol_transmission * factor,
-            lambda_int,
-        )
-        denom = np.trapz(interpol_transmission * factor, lambda_int)
-        flux = nom / denom
-        return flux
+    # --------------------------------------------------------------------------------
+    def quadrature(self):
+        """Normalized quadrature weights of the filter on its integration grid.
+
+        With the "grid" integration method, the flux of a spectrum in the
+        filter is the sum of the spectrum interpolated on the grid, multiplied
+        by the weights. The weights
+        include the transmission, the detector type (photon or energy counter),
+        and the trapezoidal rule, and are normalized to unit sum. They are
+        computed once per filter.
+
+        Returns
+        -------
+        np.ndarray, np.ndarray
+            The integration grid (micron) and the weights
+        """
+
+        if self._quadrature is None:
+            # Wavelength range to integrate over
+            lambda_int = np.arange(self.wave.min(), self.wave.max(), INTEGRATION_STEP)
+
+            # Detector type
+            # Photon counter
+            if self.photon_counter:
+                factor = lambda_int
+            # Energy counter
+            else:
+                factor = np.ones_like(lambda_int)
+
+            # Interpolate over the transmission range
+            interpol_transmission = np.interp(lambda_int, self.wave, self.trans)
+
+            # Trapezoidal rule written as weights on the grid
+            trapz = np.zeros_like(lambda_int)
+            trapz[:-1] += np.diff(lambda_int) / 2
+            trapz[1:] += np.diff(lambda_int) / 2
+
+            weights = interpol_transmission * factor * trapz
+            weights /= weights.sum()
+
+            lambda_int.flags.writeable = False
+            weights.flags.writeable = False
+            self._quadrature = (lambda_int, weights)
+
+        return self._quadrature
 
     # --------------------------------------------------------------------------------
     def solar_color(self, filter, phot_sys="Vega", vega=None):
@@ -169,11 +423,11 @@ class Filter:
             The solar color
         """
         if not isinstance(filter, ska.Filter):
-            filter = ska.Filter(filter)
+            filter = ska.Filter.get(filter)
 
         # Extract Solar Fluxes
-        sun_1 = self.VOFilter.get_field_by_id("Fsun").value
-        sun_2 = filter.VOFilter.get_field_by_id("Fsun").value
+        sun_1 = self.solar_flux
+        sun_2 = filter.solar_flux
 
         # Convert to magnitude
         mag_1 = -2.5 * np.log10(sun_1)
@@ -186,21 +440,19 @@ class Filter:
 
         # Solar color in Vega photometric system
         elif phot_sys == "Vega":
-            # Read Vega spectrum if not provided
-            if not "vega" in locals():
-                vega = ska.Spectrum(ska.PATH_VEGA)
-            else:
-                if not isinstance(vega, ska.Spectrum):
-                    vega = ska.Spectrum(ska.PATH_VEGA)
+            # Use the cached Vega spectrum if not provided
+            if not isinstance(vega, ska.Spectrum):
+                vega = None
 
             # Compute color of Vega
-            vega_ST = vega.compute_color(self, filter, phot_sys="ST")
+            flux1_vega, flux2_vega = ska.cache.reference_fluxes([self, filter], vega)
+            vega_ST = -2.5 * np.log10(flux1_vega / flux2_vega)
             return colorST - vega_ST
 
         # Solar color in ST photometric system
         else:
-            pivot_1 = self.VOFilter.get_field_by_id("WavelengthPivot").value
-            pivot_2 = filter.VOFilter.get_field_by_id("WavelengthPivot").value
+            pivot_1 = self.pivot_wavelength
+            pivot_2 = filter.pivot_wavelength
             return colorST - 5 * np.log10(pivot_1 / pivot_2)
 
     # --------------------------------------------------------------------------------
@@ -0,0 +1,228 @@
+import collections
+
+import numpy as np
+
+import ska
+
+# Number of wavelength grids for which the projected weights are kept
+PROJECTION_CACHE_SIZE = 32
+
+
+class FilterBank:
+    # --------------------------------------------------------------------------------
+    def __init__(self, filters, method=None):
+        """Initiate a SKA bank of filters
+
+        The weights of all the filters on the wavelength grid of the spectra
+        are computed once per grid, so that the band-averaged fluxes of a
+        spectrum, or of a stack of spectra, are a single weighted sum. With
+        the "grid" integration method, the normalized quadrature weights of
+        the filters are stored on a common wavelength grid.
+
+        Parameters
+        ----------
+        filters : list of ska.Filter or str
+            The filters, as SKA Filter objects or filter unique IDs (see
+            `SVO Filter Service <http://svo2.cab.inta-csic.es/theory/fps`__)
+
+        method : str
+            The integration method, "exact" or "grid" (default=None, the
+            value of ska.filter.INTEGRATION_METHOD)
+        """
+
+        self._filters = [
+            f if isinstance(f, ska.Filter) else ska.Filter.get(f) for f in filters
+        ]
+
+        # Store attributes
+        self.ids = [f.id for f in self._filters]
+        self.pivot_wavelength = np.array([f.pivot_wavelength for f in self._filters])
+        self.solar_flux = np.array(
+            [np.nan if f.solar_flux is None else f.solar_flux for f in self._filters]
+        )
+
+        self.method = ska.filter.INTEGRATION_METHOD if method is None else method
+        self.wave = None
+        self.weights = None
+
+        if self.method == "grid":
+            # Common grid: the union of the integration grids of the filters
+            quadratures = [f.quadrature() for f in self._filters]
+            self.wave = np.unique(np.concatenate([grid for grid, _ in quadratures]))
+
+            # Weights of each filter on the common grid
+            self.weights = np.zeros((len(self._filters), len(self.wave)))
+            for i, (grid, weights) in enumerate(quadratures):
+                self.weights[i, np.searchsorted(self.wave, grid)] = weights
+
+        self._projections = collections.OrderedDict()
+
+    # --------------------------------------------------------------------------------
+    def __len__(self):
+        return len(self.ids)
+
+    # --------------------------------------------------------------------------------
+    def __getstate__(self):
+        # Filters are reloaded from the cache on demand after unpickling, the
+        # weights projected so far are kept so that workers do not rebuild them
+        state = self.__dict__.copy()
+        state["_filters"] = None
+        state["_projections"] = collections.OrderedDict(self._projections)
+        return state
+
+    # --------------------------------------------------------------------------------
+    @property
+    def filters(self):
+        """The SKA Filter objects of the bank"""
+        if self._filters is None:
+            self._filters = [ska.Filter.get(id) for id in self.ids]
+        return self._filters
+
+    # --------------------------------------------------------------------------------
+    def project(self, wave, sun=None):
+        """Project the weights of the filters onto a wavelength grid.
+
+        The dot product of the projected weights with a flux sampled on the
+        grid equals the band-averaged flux of its linear interpolation.
+
+        Parameters
+        ----------
+        wave : np.ndarray
+            The sorted wavelength grid (micron)
+
+        sun : ska.Spectrum
+            If provided, the weights are multiplied by this spectrum, so that
+            the projected weights apply to reflectances (default=None)
+
+        Returns
+        -------
+        np.ndarray
+            The (n_filters, len(wave)) projected weights
+        """
+
+        key = ska.cache.array_checksum(wave)
+        if sun is not None:
+            key += ska.cache.array_checksum(sun.wave, sun.flux)
+
+        if key not in self._projections:
+            if self.method == "grid":
+                weights = self.weights
+                if sun is not None:
+                    weights = weights * ska.interp.plan(sun.wave, self.wave)(sun.flux)
+                self._projections[key] = project(self.wave, weights, wave)
+
+            # Reflectances times the Sun, linear between the breakpoints of both
+            elif sun is not None:
+                grid = np.union1d(wave, sun.wave)
+                weights = np.vstack([f.weights(grid, "exact") for f in self.filters])
+                weights *= ska.interp.plan(sun.wave, grid)(sun.flux)
+                self._projections[key] = project(grid, weights, wave)
+
+            else:
+                self._projections[key] = np.vstack(
+                    [f.weights(wave, "exact") for f in self.filters]
+                )
+            if len(self._projections) > PROJECTION_CACHE_SIZE:
+                self._projections.popitem(last=False)
+        else:
+            self._projections.move_to_end(key)
+        return self._projections[key]
+
+    # --------------------------------------------------------------------------------
+    def compute_flux(self, spectra, sun=None):
+        """Computes the band-averaged fluxes of spectra in all the filters.
+
+        Parameters
+        ----------
+        spectra : ska.Spectrum, list of ska.Spectrum, ska.SpectrumCollection or tuple
+            A spectrum, a list or a collection of spectra, or a (wave, flux)
+            tuple with a 1D wavelength grid (micron) and a 2D array of fluxes
+            with one spectrum per row
+
+        sun : ska.Spectrum
+            If provided, the spectra are reflectances to be multiplied by this
+            spectrum of the Sun (default=None)
+
+        Returns
+        -------
+        np.ndarray
+            The (n_filters,) fluxes of a single spectrum, or the
+            (n_spectra, n_filters) fluxes of many spectra
+        """
+
+        # A single spectrum
+        if isinstance(spectra, ska.Spectrum):
+            return self.project(spectra.wave, sun=sun) @ spectra.flux
+
+        # A collection of spectra, in a dense or ragged layout
+        if isinstance(spectra, ska.SpectrumCollection):
+            if spectra.is_dense:
+                return spectra.flux @ self.project(spectra.wave, sun=sun).T
+
+            fluxes = np.empty((len(spectra), len(self)))
+            for i in range(len(spectra)):
+                wave, flux = spectra.arrays(i)
+                fluxes[i] = self.project(wave, sun=sun) @ flux
+            return fluxes
+
+        # A stack of fluxes sharing a single wavelength grid
+        if isinstance(spectra, tuple):
+            wave, flux = spectra
+            flux = np.atleast_2d(flux)
+            return flux @ self.project(np.asarray(wave), sun=sun).T
+
+        # Group spectra sharing the same wavelength grid
+        groups = {}
+        for i, spectrum in enumerate(spectra):
+            key = ska.cache.array_checksum(spectrum.wave)
+            groups.setdefault(key, []).append(i)
+
+        fluxes = np.empty((len(spectra), len(self)))
+        for rows in groups.values():
+            wave = spectra[rows[0]].wave
+            block = np.vstack([spectra[i].flux for i in rows])
+            fluxes[rows] = block @ self.project(wave, sun=sun).T
+        return fluxes
+
+    # --------------------------------------------------------------------------------
+    def reference_flux(self, vega=None):
+        """Fluxes of Vega in all the filters, from the cache of reference fluxes.
+
+        Parameters
+        ----------
+        vega : ska.Spectrum
+            The spectrum of Vega (default=None, the cached spectrum of Vega)
+
+        Returns
+        -------
+        np.ndarray
+            The (n_filters,) fluxes of Vega
+        """
+        return ska.cache.reference_fluxes(self.filters, vega)
+
+
+# --------------------------------------------------------------------------------
+def project(grid, weights, wave):
+    """Project weights defined on a grid onto another wavelength grid.
+
+    This is the transpose of the linear interpolation (as in np.interp) from
+    wave onto grid, so that the dot product of the projected weights with a
+    flux sampled on wave equals the weighted sum of its interpolation on grid.
+
+    Parameters
+    ----------
+    grid : np.ndarray
+        The grid on which the weights are defined
+
+    weights : np.ndarray
+        The (n_grid,) or (n_filters, n_grid) weights
+
+    wave : np.ndarray
+        The sorted wavelength grid to project onto
+
+    Returns
+    -------
+    np.ndarray
+        The weights on the wavelength grid
+    """
+    return ska.interp.InterpolationPlan(wave, grid).transpose(weights)
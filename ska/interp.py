@@ -0,0 +1,154 @@
+"""Linear interpolation between wavelength grids, planned once per pair of grids"""
+
+import collections
+import threading
+
+import numpy as np
+
+import ska
+
+# Number of interpolation plans kept by plan()
+PLAN_CACHE_SIZE = 64
+
+_PLANS = collections.OrderedDict()
+_PLANS_LOCK = threading.Lock()
+
+
+class InterpolationPlan:
+    # --------------------------------------------------------------------------------
+    @ska.profiling.timed("interp.plan")
+    def __init__(self, source, target):
+        """Initiate a SKA plan of linear interpolation from a grid onto another
+
+        The interval of the source grid holding each point of the target grid,
+        and the position of the point within it, are computed once. The plan
+        is then a sparse matrix with two non-zero elements per row, applied to
+        any flux sampled on the source grid as in np.interp: values outside of
+        the source grid are those of its ends.
+
+        Parameters
+        ----------
+        source : np.ndarray
+            The sorted wavelength grid of the fluxes to interpolate
+
+        target : np.ndarray
+            The wavelength grid to interpolate onto
+        """
+
+        source = np.asarray(source, dtype=float)
+        target = np.asarray(target, dtype=float)
+        n = len(source)
+
+        # Left point of the interval of each target point, and position within it
+        if n > 1:
+            index = np.clip(np.searchsorted(source, target, side="right") - 1, 0, n - 2)
+            dx = source[index + 1] - source[index]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                t = np.where(dx > 0, (target - source[index]) / dx, 0.0)
+            t = np.clip(t, 0, 1)
+        else:
+            index = np.zeros(len(target), dtype=int)
+            t = np.zeros(len(target))
+
+        # Store attributes
+        self.shape = (len(target), n)
+        self.index = index
+        self.weight = t
+        self._right = np.minimum(index + 1, n - 1)
+        self._left_weight = 1 - t
+        for arr in [self.index, self.weight, self._right, self._left_weight]:
+            arr.flags.writeable = False
+
+    # --------------------------------------------------------------------------------
+    @ska.profiling.timed("interp.apply")
+    def __call__(self, flux):
+        """Interpolate fluxes onto the target grid
+
+        Parameters
+        ----------
+        flux : np.ndarray
+            The (n_source,) flux, or the (n_spectra, n_source) stack of fluxes
+
+        Returns
+        -------
+        np.ndarray
+            The (n_target,) or (n_spectra, n_target) interpolated fluxes
+        """
+        flux = np.asarray(flux, dtype=float)
+        out = flux[..., self.index] * self._left_weight
+        out += flux[..., self._right] * self.weight
+        return out
+
+    # --------------------------------------------------------------------------------
+    def transpose(self, weights):
+        """Project weights defined on the target grid onto the source grid
+
+        The dot product of the projected weights with a flux on the source
+        grid equals the dot product of the weights with its interpolation.
+
+        Parameters
+        ----------
+        weights : np.ndarray
+            The (n_target,) or (n_filters, n_target) weights
+
+        Returns
+        -------
+        np.ndarray
+            The (n_filters, n_source) projected weights
+        """
+        weights = np.atleast_2d(weights)
+        n = self.shape[1]
+        if n == 1:
+            return weights.sum(axis=1, keepdims=True)
+
+        # Scatter the weights on both ends of each interval
+        out = np.zeros((weights.shape[0], n))
+        for row, w in zip(out, weights):
+            row += np.bincount(self.index, w * self._left_weight, minlength=n)
+            row += np.bincount(self._right, w * self.weight, minlength=n)
+        return out
+
+
+# --------------------------------------------------------------------------------
+def plan(source, target):
+    """Plan of linear interpolation between two grids, built once per pair of grids
+
+    Plans are kept in a bounded cache, keyed by the checksums of both grids,
+    so that spectra sharing a grid reuse the plan onto the same target grid.
+
+    Parameters
+    ----------
+    source : np.ndarray
+        The sorted wavelength grid of the fluxes to interpolate
+
+    target : np.ndarray
+        The wavelength grid to interpolate onto
+
+    Returns
+    -------
+    ska.interp.InterpolationPlan
+        The interpolation plan
+    """
+    key = (ska.cache.array_checksum(source), ska.cache.array_checksum(target))
+
+    with _PLANS_LOCK:
+        if key in _PLANS:
+            _PLANS.move_to_end(key)
+            ska.profiling.lookup("interp.plans", True)
+            return _PLANS[key]
+    ska.profiling.lookup("interp.plans", False)
+
+    new = InterpolationPlan(source, target)
+
+    with _PLANS_LOCK:
+        _PLANS[key] = new
+        while len(_PLANS) > PLAN_CACHE_SIZE:
+            _PLANS.popitem(last=False)
+    return new
+
+
+# --------------------------------------------------------------------------------
+def clear_plans():
+    """Remove all the plans from the cache used by plan()"""
+    with _PLANS_LOCK:
+        _PLANS.clear()
@@ -0,0 +1,277 @@
+"""Opt-in timers and counters of the hot paths of ska"""
+
+import atexit
+import collections
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+# Environment variable enabling the profiling when ska is imported: "1" or
+# "table" prints a table at exit, "json" prints JSON, any other value is the
+# file the JSON is written to at exit
+ENV_VARIABLE = "SKA_PROFILE"
+
+# Whether the timers and counters are recorded, see enable()
+ENABLED = False
+
+# Where the report is written at exit: "table", "json", or a file
+_OUTPUT = None
+_REGISTERED = False
+
+# Number of calls and total, max durations (s) by stage; hits and misses by
+# cache; other counters (e.g. bytes downloaded)
+_TIMERS = {}
+_LOOKUPS = {}
+_COUNTERS = collections.Counter()
+_LOCK = threading.Lock()
+
+
+# --------------------------------------------------------------------------------
+def enable(output="table"):
+    """Record the timers and counters, and report them at exit
+
+    Parameters
+    ----------
+    output : str
+        "table" to print a table on stderr at exit, "json" to print JSON on
+        stderr, a path to write JSON to, or None not to report at exit
+        (default="table")
+    """
+    global ENABLED, _OUTPUT, _REGISTERED
+
+    ENABLED = True
+    _OUTPUT = output
+    if not _REGISTERED:
+        atexit.register(_report_at_exit)
+        _REGISTERED = True
+
+
+# --------------------------------------------------------------------------------
+def disable():
+    """Stop recording the timers and counters, and do not report them at exit"""
+    global ENABLED, _OUTPUT
+
+    ENABLED = False
+    _OUTPUT = None
+
+
+# --------------------------------------------------------------------------------
+def reset():
+    """Remove all the recorded timers and counters"""
+    with _LOCK:
+        _TIMERS.clear()
+        _LOOKUPS.clear()
+        _COUNTERS.clear()
+
+
+# --------------------------------------------------------------------------------
+def timed(name):
+    """Decorator recording the number of calls and duration of a function
+
+    When the profiling is disabled, the wrapper only tests ENABLED before
+    calling the function.
+
+    Parameters
+    ----------
+    name : str
+        The name of the stage, e.g. "svo.fetch"
+    """
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _add_time(name, time.perf_counter() - t0)
+
+        return wrapper
+
+    return decorator
+
+
+# --------------------------------------------------------------------------------
+class stage:
+    """Context manager recording the duration of a block of code
+
+    Examples
+    --------
+    .. code-block:: python
+
+        with ska.profiling.stage("svo.parse_votable"):
+            VOFilter = parse(path)
+    """
+
+    __slots__ = ("name", "t0")
+
+    def __init__(self, name):
+        self.name = name
+        self.t0 = None
+
+    def __enter__(self):
+        if ENABLED:
+            self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.t0 is not None:
+            _add_time(self.name, time.perf_counter() - self.t0)
+
+
+# --------------------------------------------------------------------------------
+def lookup(name, hit):
+    """Record a hit or a miss of a cache
+
+    Parameters
+    ----------
+    name : str
+        The name of the cache, e.g. "filter.registry"
+
+    hit : bool
+        Whether the value was found in the cache
+    """
+    if not ENABLED:
+        return
+    with _LOCK:
+        counts = _LOOKUPS.setdefault(name, [0, 0])
+        counts[0 if hit else 1] += 1
+
+
+# --------------------------------------------------------------------------------
+def count(name, value=1):
+    """Increment a counter
+
+    Parameters
+    ----------
+    name : str
+        The name of the counter, e.g. "svo.bytes_downloaded"
+
+    value : int
+        The increment (default=1)
+    """
+    if not ENABLED:
+        return
+    with _LOCK:
+        _COUNTERS[name] += value
+
+
+# --------------------------------------------------------------------------------
+def report():
+    """The recorded timers and counters
+
+    Durations are inclusive (the duration of a stage includes the stages it
+    calls), and summed over threads.
+
+    Returns
+    -------
+    dict
+        The timers (calls, total, mean and max durations in s), the lookups
+        of caches (hits, misses) and the counters, by name
+    """
+    with _LOCK:
+        return {
+            "timers": {
+                name: {
+                    "calls": calls,
+                    "total": total,
+                    "mean": total / calls,
+                    "max": longest,
+                }
+                for name, (calls, total, longest) in sorted(_TIMERS.items())
+            },
+            "lookups": {
+                name: {"hits": hits, "misses": misses}
+                for name, (hits, misses) in sorted(_LOOKUPS.items())
+            },
+            "counters": dict(sorted(_COUNTERS.items())),
+        }
+
+
+# --------------------------------------------------------------------------------
+def print_report(file=None):
+    """Print the recorded timers and counters as tables
+
+    Parameters
+    ----------
+    file : file
+        The stream to print to (default=None, stderr)
+    """
+    from rich.console import Console
+    from rich.table import Table
+
+    console = Console(file=file or sys.stderr)
+    results = report()
+
+    table = Table(title="ska profile: stages")
+    table.add_column("Stage")
+    for column in ["Calls", "Total (ms)", "Mean (ms)", "Max (ms)"]:
+        table.add_column(column, justify="right")
+    for name, t in results["timers"].items():
+        table.add_row(
+            name,
+            str(t["calls"]),
+            f"{t['total'] * 1e3:.3f}",
+            f"{t['mean'] * 1e3:.3f}",
+            f"{t['max'] * 1e3:.3f}",
+        )
+    console.print(table)
+
+    table = Table(title="ska profile: caches")
+    table.add_column("Cache")
+    for column in ["Hits", "Misses", "Hit rate"]:
+        table.add_column(column, justify="right")
+    for name, c in results["lookups"].items():
+        rate = c["hits"] / (c["hits"] + c["misses"])
+        table.add_row(name, str(c["hits"]), str(c["misses"]), f"{rate:.1%}")
+    console.print(table)
+
+    if results["counters"]:
+        table = Table(title="ska profile: counters")
+        table.add_column("Counter")
+        table.add_column("Value", justify="right")
+        for name, value in results["counters"].items():
+            table.add_row(name, f"{value:,}")
+        console.print(table)
+
+
+# --------------------------------------------------------------------------------
+def _add_time(name, duration):
+    """Add a call of a stage"""
+    with _LOCK:
+        timer = _TIMERS.get(name)
+        if timer is None:
+            _TIMERS[name] = [1, duration, duration]
+        else:
+            timer[0] += 1
+            timer[1] += duration
+            timer[2] = max(timer[2], duration)
+
+
+# --------------------------------------------------------------------------------
+def _report_at_exit():
+    """Write the report where requested by enable()"""
+    if _OUTPUT is None:
+        return
+    try:
+        if _OUTPUT == "table":
+            print_report()
+        elif _OUTPUT == "json":
+            json.dump(report(), sys.stderr, indent=2)
+            sys.stderr.write("\n")
+        else:
+            with open(_OUTPUT, "w") as file:
+                json.dump(report(), file, indent=2)
+    except (OSError, ValueError):
+        pass
+
+
+# Enable from the environment
+if os.environ.get(ENV_VARIABLE, "") not in ["", "0"]:
+    _value = os.environ[ENV_VARIABLE]
+    enable("table" if _value in ["1", "table"] else _value)
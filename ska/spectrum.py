@@ -16,6 +16,7 @@ class Spectrum:
         # Store attributes
         self.wave = None
         self.flux = None
+        self.error = None
         self.is_refl = False
 
         if "input" in locals():
@@ -23,7 +24,9 @@ class Spectrum:
             # Initialize from a str: file or a taxonomic class
             if isinstance(input, str):
 
-                if os.path.isfile(input):
+                if input.endswith(ska.store.SUFFIX):
+                    self.from_binary(input)
+                elif os.path.isfile(input):
                     self.from_csv(input)
                 else:
                     self.from_taxonomy(input)
@@ -42,11 +45,46 @@ class Spectrum:
 
     # --------------------------------------------------------------------------------
     def copy(self):
-        """Make a deepcopy of the SKA.Spectrum object."""
+        """Make a copy of the SKA.Spectrum object, sharing its read-only arrays.
 
-        from copy import deepcopy
+        Read-only arrays (read from files, templates, or shared with other
+        spectra) are shared with the copy, and only copied when it is made
+        writable (see Spectrum.writable). Writable arrays are copied, so that
+        the spectrum is left as it was. Assigning new arrays to the
+        attributes does not affect the other spectrum.
 
-        return deepcopy(self)
+        Returns
+        -------
+        ska.Spectrum
+            The copy
+        """
+
+        from copy import copy
+
+        new = copy(self)
+        for name in ["wave", "flux", "error"]:
+            arr = getattr(self, name)
+            if arr is not None and arr.flags.writeable:
+                setattr(new, name, np.array(arr))
+        return new
+
+    # --------------------------------------------------------------------------------
+    def writable(self):
+        """Make the arrays of the spectrum writable in place.
+
+        Arrays shared with other spectra, or read from files, are copied.
+        Arrays owned by the spectrum are kept.
+
+        Returns
+        -------
+        ska.Spectrum
+            The spectrum itself
+        """
+        for name in ["wave", "flux", "error"]:
+            arr = getattr(self, name)
+            if arr is not None and not arr.flags.writeable:
+                setattr(self, name, np.array(arr))
+        return self
 
     # --------------------------------------------------------------------------------
     # --------------------------------------------------------------------------------
@@ -54,6 +92,7 @@ class Spectrum:
     # Spectrum from Input
 
     # --------------------------------------------------------------------------------
+    @ska.profiling.timed("spectrum.from_csv")
     def from_csv(self, file):
         """Create a SKA spectrum from a CSV file.
 
@@ -67,14 +106,69 @@ class Spectrum:
             rich.print(f"[red]Spectrum file {file} not found.[/red].")
             sys.exit(1)
 
-        # Read spectrum
+        # Read spectrum, from the binary spectrum file of cached spectra
         try:
-            spectrum = pd.read_csv(file)
+            columns = ska.store.read_columns(file)
         except:
             rich.print(f"[red]Cannot read spectrum file {file}.[/red].")
             sys.exit(1)
 
-        self.from_dataframe(spectrum)
+        self.from_columns(columns)
+
+    # --------------------------------------------------------------------------------
+    @ska.profiling.timed("spectrum.from_binary")
+    def from_binary(self, file):
+        """Create a SKA spectrum from a binary spectrum file (see ska.store).
+
+        The columns are memory-mapped, and used without copy.
+
+        Parameters
+        ----------
+        file : str
+            Path to a binary spectrum file (.skaspec)
+        """
+
+        if not os.path.isfile(file):
+            rich.print(f"[red]Spectrum file {file} not found.[/red].")
+            sys.exit(1)
+
+        try:
+            columns = ska.store.read_spectrum_file(file)[1]
+        except:
+            rich.print(f"[red]Cannot read spectrum file {file}.[/red].")
+            sys.exit(1)
+
+        self.from_columns(columns)
+
+    # --------------------------------------------------------------------------------
+    def from_columns(self, columns):
+        """Create a SKA spectrum from arrays sorted by wavelength, without copy.
+
+        Parameters
+        ----------
+        columns : dict
+            The arrays by column name: Wavelength (in micron), and either Flux
+            or Reflectance, and optionally Error.
+        """
+
+        if not "Wavelength" in columns:
+            rich.print(f"[red]Column 'Wavelength' missing from input.[/red]")
+        if not "Flux" in columns and not "Reflectance" in columns:
+            rich.print(f"[red]Column 'Flux' or 'Reflectance' missing from input.[/red]")
+            sys.exit(1)
+        if not "Wavelength" in columns:
+            sys.exit(1)
+
+        wave = columns["Wavelength"]
+        if np.any(wave[1:] < wave[:-1]):
+            rich.print(f"[red]Wavelengths must be sorted in increasing order.[/red]")
+            sys.exit(1)
+
+        # Store attributes
+        self.wave = wave
+        self.is_refl = "Reflectance" in columns
+        self.flux = columns["Reflectance" if self.is_refl else "Flux"]
+        self.error = columns.get("Error")
 
     # --------------------------------------------------------------------------------
     def from_numpy(self, arr, reflectance=False):
@@ -84,7 +178,8 @@ class Spectrum:
         ----------
         arr : np.ndarray
             A numpy array containing the spectrum. Columns must be
-            Wavelength (in micron), and either Flux or Reflectance.
+            Wavelength (in micron), and either Flux or Reflectance, optionally
+            followed by the uncertainty of the flux or reflectance.
 
         reflectance : boolean
             Set True if the input is a reflectance spectrum (default=False)
@@ -98,10 +193,62 @@ class Spectrum:
             rich.print(f"[red]Input array has less than 2 columns.[/red]")
             sys.exit(1)
 
-        # Store attributes
-        order = np.argsort(arr[:, 0])
-        self.wave = arr[order, 0]
-        self.flux = arr[order, 1]
+        # Store attributes, without copy for the columns of Fortran-ordered arrays
+        self.from_arrays(
+            arr[:, 0],
+            arr[:, 1],
+            arr[:, 2] if arr.shape[1] > 2 else None,
+            reflectance=reflectance,
+        )
+
+    # --------------------------------------------------------------------------------
+    def from_arrays(self, wave, flux, error=None, reflectance=False):
+        """Create a SKA spectrum from numpy arrays.
+
+        Arrays of float64, contiguous and sorted by wavelength are used
+        without copy, as read-only views so that they are not modified
+        through the spectrum: they are copied only if the spectrum is made
+        writable (see Spectrum.writable). Other arrays are converted, and
+        sorted by wavelength, and stay writable.
+
+        Parameters
+        ----------
+        wave : np.ndarray
+            The wavelength (in micron)
+
+        flux : np.ndarray
+            The flux or the reflectance
+
+        error : np.ndarray
+            The uncertainty of the flux or reflectance (default=None)
+
+        reflectance : boolean
+            Set True if the input is a reflectance spectrum (default=False)
+        """
+
+        arrays = [np.ascontiguousarray(wave, dtype=float)]
+        arrays.append(np.ascontiguousarray(flux, dtype=float))
+        if error is not None:
+            arrays.append(np.ascontiguousarray(error, dtype=float))
+
+        if any(arr.shape != arrays[0].shape for arr in arrays):
+            rich.print(f"[red]Wavelength and flux must be arrays of same length.[/red]")
+            sys.exit(1)
+
+        # Sort by wavelength, only if needed
+        if np.any(arrays[0][1:] < arrays[0][:-1]):
+            order = np.argsort(arrays[0], kind="stable")
+            arrays = [arr[order] for arr in arrays]
+
+        # Store attributes, protecting the arrays of the caller
+        inputs = [wave, flux, error]
+        arrays = [
+            _shared(arr) if np.may_share_memory(arr, input) else arr
+            for arr, input in zip(arrays, inputs)
+        ]
+        self.wave = arrays[0]
+        self.flux = arrays[1]
+        self.error = arrays[2] if error is not None else None
         self.is_refl = reflectance
 
     # --------------------------------------------------------------------------------
@@ -112,7 +259,8 @@ class Spectrum:
         ----------
         df : pd.DataFrame
             A DataFrame containing the spectrum. Columns must be
-            Wavelength (in micron), and either Flux or Reflectance.
+            Wavelength (in micron), and either Flux or Reflectance. An optional
+            Error column holds the uncertainty of the flux or reflectance.
         """
 
         # Test Wavelength column
@@ -136,16 +284,28 @@ class Spectrum:
         if not (check_wave & (check_flux | check_refl)):
             sys.exit(1)
 
-        # Store attributes
-        order = np.argsort(df.Wavelength)
-        self.wave = np.array(df.loc[order, "Wavelength"].values)
+        # Sort by wavelength, only if needed
+        order = None
+        if not df["Wavelength"].is_monotonic_increasing:
+            order = np.argsort(df["Wavelength"].to_numpy(), kind="stable")
+
+        # Store attributes, as a single copy of each column
+        def column(name):
+            values = df[name].to_numpy(dtype=float)
+            return np.array(values) if order is None else values[order]
+
+        self.wave = column("Wavelength")
         if check_flux:
-            self.flux = np.array(df.loc[order, "Flux"].values)
+            self.flux = column("Flux")
         if check_refl:
-            self.flux = np.array(df.loc[order, "Reflectance"].values)
+            self.flux = column("Reflectance")
             self.is_refl = True
+        self.error = None
+        if "Error" in df.columns:
+            self.error = column("Error")
 
     # --------------------------------------------------------------------------------
+    @ska.profiling.timed("spectrum.from_taxonomy")
     def from_taxonomy(self, type):
         """Create a SKA reflectance spectrum from an asteroid template spectrum (Mahlke+2022 taxonomy).
 
@@ -155,15 +315,14 @@ class Spectrum:
             The name of the spectral type (A, B, C, D, E, K, L... V, Z)
         """
 
-        # Read template spectra of Mahlke+2022 taxonomy
-        templates = pd.read_csv(ska.PATH_MAHLKE)
+        # Template spectra of Mahlke+2022 taxonomy, read once
+        templates = ska.taxonomy.template_bank()
 
         # Select the requested type
-        if type in templates.columns:
-            cols = ["feature", type]
-            df = templates[cols]
-            df.columns = ["Wavelength", "Reflectance"]
-            self.from_dataframe(df)
+        if type in templates:
+            template = templates.spectrum(type)
+            self.wave, self.flux = template.wave, template.flux
+            self.is_refl = True
         else:
             rich.print(
                 f"[red]Type[/red] [bright_cyan]{type}[/bright_cyan] [red]not found in Mahlke+2022 taxonomy.[/red]"
@@ -179,17 +338,10 @@ class Spectrum:
             The temperature of the blackbody in Kelvin
         """
 
-        from astropy.modeling.models import BlackBody
-        from astropy import units as u
-
-        # Blackbody function
-        bb = BlackBody(
-            temperature=float(T) * u.K,
-            scale=1.0 * u.erg / (u.s * (0.1 * u.nm) * u.sr * u.cm**2),
-        )
-        wave = np.linspace(0.05, 5, num=1000) * u.micron
-        flux = bb(wave)
-        self.from_numpy(np.array([wave.value, flux.value]).T)
+        # Blackbody function, in erg/s/cm2/Angstrom/sr
+        wave = np.linspace(0.05, 5, num=1000)
+        flux = ska.blackbody.planck(wave, T)
+        self.from_numpy(np.array([wave, flux]).T)
 
     # --------------------------------------------------------------------------------
     # --------------------------------------------------------------------------------
@@ -197,7 +349,17 @@ class Spectrum:
     # Color computation
 
     # --------------------------------------------------------------------------------
-    def compute_color(self, id_filter_1, id_filter_2, phot_sys="Vega", vega=None):
+    @ska.profiling.timed("spectrum.compute_color")
+    def compute_color(
+        self,
+        id_filter_1,
+        id_filter_2,
+        phot_sys="Vega",
+        vega=None,
+        n_samples=None,
+        seed=None,
+        percentiles=(16, 50, 84),
+    ):
         """Computes filter_1-filter_2 color of spectrum in the requested system.
 
         Parameters
@@ -212,24 +374,48 @@ class Spectrum:
             Photometric system in which to report the color (default=Vega)
 
         vega : ska.Spectrum
-            The spectrum of Vega
+            The spectrum of Vega (default=None, the cached spectrum of Vega)
+
+        n_samples : int
+            If provided, the uncertainty of the color is estimated from this
+            number of random realizations of the spectrum, drawn from its
+            error (default=None)
+
+        seed : int
+            The seed of the random realizations (default=None)
+
+        percentiles : tuple
+            The percentiles of the realizations to report (default=16, 50, 84)
 
         Returns
         =======
-        float
-            The requested color
+        float or dict
+            The requested color. With n_samples, a dict with the mean, std,
+            and percentiles (by percentile) of the colors of the realizations.
         """
 
+        # Colors of random realizations of the spectrum
+        if n_samples is not None:
+            samples = ska.colors.monte_carlo_colors(
+                self,
+                [(id_filter_1, id_filter_2)],
+                n_samples,
+                phot_sys=phot_sys,
+                vega=vega,
+                seed=seed,
+            )
+            return ska.colors.summarize_samples(samples[:, 0], percentiles)
+
         # Load Filters if provided as strings
         if isinstance(id_filter_1, ska.Filter):
             filter_1 = id_filter_1
         else:
-            filter_1 = ska.Filter(id_filter_1)
+            filter_1 = ska.Filter.get(id_filter_1)
 
         if isinstance(id_filter_2, ska.Filter):
             filter_2 = id_filter_2
         else:
-            filter_2 = ska.Filter(id_filter_2)
+            filter_2 = ska.Filter.get(id_filter_2)
 
         # Compute fluxes in each filter
         flux1 = filter_1.compute_flux(self)
@@ -238,21 +424,18 @@ class Spectrum:
         # Magnitude in AB photometric system
         if phot_sys == "AB":
             # Get Pivot wavelength for both filters
-            pivot_1 = filter_1.VOFilter.get_field_by_id("WavelengthPivot").value
-            pivot_2 = filter_2.VOFilter.get_field_by_id("WavelengthPivot").value
+            pivot_1 = filter_1.pivot_wavelength
+            pivot_2 = filter_2.pivot_wavelength
 
             # Compute and return the color
             return -2.5 * np.log10(flux1 / flux2) - 5 * np.log10(pivot_1 / pivot_2)
 
         # Magnitude in Vega photometric system
         elif phot_sys == "Vega":
-            # Read Vega spectrum if not provided
-            if vega is None:
-                vega = ska.Spectrum(ska.PATH_VEGA)
-
-            # Compute fluxes of Vega in each filter
-            flux1_vega = filter_1.compute_flux(vega)
-            flux2_vega = filter_2.compute_flux(vega)
+            # Fluxes of Vega in each filter, computed once and cached on disk
+            flux1_vega, flux2_vega = ska.cache.reference_fluxes(
+                [filter_1, filter_2], vega
+            )
 
             # Compute and return the color
             return -2.5 * (np.log10(flux1 / flux1_vega) - np.log10(flux2 / flux2_vega))
@@ -262,6 +445,7 @@ class Spectrum:
             return -2.5 * np.log10(flux1 / flux2)
 
     # --------------------------------------------------------------------------------
+    @ska.profiling.timed("spectrum.reflectance_to_flux")
     def reflectance_to_flux(self, sun=None):
         """Convert reflectance to flux by multiply by Solar spectrum.
 
@@ -282,20 +466,33 @@ class Spectrum:
 
         # Read spectrum of the Sun if not provided
         if not isinstance(sun, ska.Spectrum):
+            ska.cache.ensure_sun_and_vega()
             sun = ska.Spectrum(ska.PATH_SUN)
 
         # Interpolate spectrum of the Sun
-        interpol_spectrum = np.interp(self.wave, sun.wave, sun.flux)
+        interpol_spectrum = ska.interp.plan(sun.wave, self.wave)(sun.flux)
 
-        # Mulitply reflectance by Solar spectrum
+        # Mulitply reflectance by Solar spectrum, sharing a read-only wavelength
         spectrum = self.copy()
-        spectrum.flux = self.flux * interpol_spectrum
+        if self.error is not None:
+            spectrum.error = self.error * interpol_spectrum
+        interpol_spectrum *= self.flux
+        spectrum.flux = interpol_spectrum
         spectrum.is_refl = False
         return spectrum
 
     # --------------------------------------------------------------------------------
+    @ska.profiling.timed("spectrum.reflectance_to_color")
     def reflectance_to_color(
-        self, id_filter_1, id_filter_2, phot_sys="Vega", vega=None, sun=None
+        self,
+        id_filter_1,
+        id_filter_2,
+        phot_sys="Vega",
+        vega=None,
+        sun=None,
+        n_samples=None,
+        seed=None,
+        percentiles=(16, 50, 84),
     ):
         """Computes filter_1-filter_2 color for a reflectance spectrum.
 
@@ -316,45 +513,71 @@ class Spectrum:
         sun : ska.Spectrum
             Spectrum of the Sun
 
+        n_samples : int
+            If provided, the uncertainty of the color is estimated from this
+            number of random realizations of the reflectance, drawn from its
+            error (default=None)
+
+        seed : int
+            The seed of the random realizations (default=None)
+
+        percentiles : tuple
+            The percentiles of the realizations to report (default=16, 50, 84)
+
         Returns
         =======
-        float
-            The requested color
+        float or dict
+            The requested color. With n_samples, a dict with the mean, std,
+            and percentiles (by percentile) of the colors of the realizations.
         """
+
+        # Colors of random realizations of the reflectance
+        if n_samples is not None:
+            samples = ska.colors.monte_carlo_colors(
+                self,
+                [(id_filter_1, id_filter_2)],
+                n_samples,
+                phot_sys=phot_sys,
+                reflectance=True,
+                vega=vega,
+                sun=sun,
+                seed=seed,
+            )
+            return ska.colors.summarize_samples(samples[:, 0], percentiles)
+
         # Load Filters if provided as strings
         if isinstance(id_filter_1, ska.Filter):
             filter_1 = id_filter_1
         else:
-            filter_1 = ska.Filter(id_filter_1)
+            filter_1 = ska.Filter.get(id_filter_1)
 
         if isinstance(id_filter_2, ska.Filter):
             filter_2 = id_filter_2
         else:
-            filter_2 = ska.Filter(id_filter_2)
-
-        # Integration grid is built from the transmission curve
-        lambda_min = np.min([filter_1.wave.min(), filter_2.wave.min()])
-        lambda_max = np.max([filter_1.wave.max(), filter_2.wave.max()])
-
-        # Wavelength range to integrate over
-        lambda_int = np.arange(lambda_min, lambda_max, 0.0005)
+            filter_2 = ska.Filter.get(id_filter_2)
 
         # Read spectrum of the Sun if not provided
         if not isinstance(sun, ska.Spectrum):
+            ska.cache.ensure_sun_and_vega()
             sun = ska.Spectrum(ska.PATH_SUN)
 
-        # Interpolate spectrum of the Sun
-        interpol_spectrum = np.interp(lambda_int, sun.wave, sun.flux)
-        interp_sun = pd.DataFrame({"Wavelength": lambda_int, "Flux": interpol_spectrum})
-        interp_sun = interp_sun.astype("float")
-
-        # Interpolate reflectance spectrum
-        interpol_spectrum = np.interp(lambda_int, self.wave, self.flux)
-        interp_spectrum = ska.Spectrum(
-            pd.DataFrame(
-                {"Wavelength": lambda_int, "Flux": interpol_spectrum * interp_sun.Flux}
-            )
-        )
+        # Exact integration: the breakpoints of the Sun and reflectance spectra
+        if ska.filter.INTEGRATION_METHOD == "exact":
+            lambda_int = np.union1d(sun.wave, self.wave)
+
+        # Integration grid is built from the transmission curve
+        else:
+            lambda_min = np.min([filter_1.wave.min(), filter_2.wave.min()])
+            lambda_max = np.max([filter_1.wave.max(), filter_2.wave.max()])
+
+            # Wavelength range to integrate over
+            lambda_int = np.arange(lambda_min, lambda_max, ska.filter.INTEGRATION_STEP)
+
+        # Interpolate spectra of the Sun and reflectance, and multiply them
+        interpol_spectrum = ska.interp.plan(sun.wave, lambda_int)(sun.flux)
+        interpol_spectrum *= ska.interp.plan(self.wave, lambda_int)(self.flux)
+        interp_spectrum = ska.Spectrum()
+        interp_spectrum.from_arrays(lambda_int, interpol_spectrum)
 
         # Compute color of the reflectance*Sun spectrum
         return interp_spectrum.compute_color(
@@ -406,7 +629,7 @@ class Spectrum:
                 if isinstance(f, ska.Filter):
                     filt = f
                 else:
-                    filt = ska.Filter(f)
+                    filt = ska.Filter.get(f)
                     ax.plot(filt.wave, filt.trans, label=filt.id)
 
         # Add labels
@@ -423,3 +646,13 @@ class Spectrum:
             fig.savefig(figure, dpi=180)
 
         return fig, ax
+
+
+# --------------------------------------------------------------------------------
+def _shared(arr):
+    """Read-only view of an array, to share it between spectra"""
+    if arr is None or not arr.flags.writeable:
+        return arr
+    view = arr.view()
+    view.flags.writeable = False
+    return view
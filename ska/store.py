@@ -0,0 +1,305 @@
+"""Binary spectrum files, memory-mapped for loading without parsing nor copies"""
+
+import glob
+import hashlib
+import importlib.util
+import json
+import os
+import struct
+
+import numpy as np
+
+import ska
+
+# Extension and signature of the binary spectrum files
+SUFFIX = ".skaspec"
+MAGIC = b"\x93SKASPEC"
+
+# Version of the format, bump to rebuild all the binary files
+# 2: rows sorted by the Wavelength column rather than the first column
+STORE_VERSION = 2
+
+# The header (signature, length, JSON) is padded to a multiple of this size
+ALIGNMENT = 64
+
+# Keep the parsed arrays of other CSV spectra in the cache, as binary files
+# named after their path, so that reading them again is a memory-map
+CSV_CACHE = True
+
+# Maximum number of those binary files, the least recently used are removed
+CSV_CACHE_SIZE = 512
+
+
+# --------------------------------------------------------------------------------
+def write_spectrum_file(path, columns, source=None):
+    """Write columns of a spectrum or a table of spectra to a binary file
+
+    The file starts with a small header: the signature, the length of the
+    header, and a JSON description of the columns. The columns follow as
+    float64 arrays, one after the other and sorted by wavelength (see
+    wavelength_column), so that each can be memory-mapped without copy.
+
+    Parameters
+    ----------
+    path : str
+        The binary file
+
+    columns : dict
+        The arrays of the columns, by name
+
+    source : str
+        The file the columns were read from. Its size and modification time
+        are stored so that the binary file is rebuilt when it changes
+        (default=None)
+    """
+
+    names = list(columns)
+    data = np.vstack([np.asarray(columns[n], dtype="<f8") for n in names])
+
+    # Sort by wavelength, only if needed
+    wave = data[names.index(wavelength_column(names))]
+    if np.any(wave[1:] < wave[:-1]):
+        data = data[:, np.argsort(wave, kind="stable")]
+
+    meta = {"version": STORE_VERSION, "columns": names, "rows": data.shape[1]}
+    if source is not None:
+        stat = os.stat(source)
+        meta["source"] = os.path.abspath(source)
+        meta["source_size"] = stat.st_size
+        meta["source_mtime"] = stat.st_mtime_ns
+
+    # Header, padded so that the columns are aligned
+    header = json.dumps(meta).encode()
+    size = len(MAGIC) + 4 + len(header)
+    header += b" " * (-size % ALIGNMENT)
+
+    # Write atomically, other processes may be reading or writing the file
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as file:
+        file.write(MAGIC)
+        file.write(struct.pack("<I", len(header)))
+        file.write(header)
+        file.write(np.ascontiguousarray(data).tobytes())
+    os.replace(tmp, path)
+
+
+# --------------------------------------------------------------------------------
+@ska.profiling.timed("store.read_binary")
+def read_spectrum_file(path):
+    """Memory-map the columns of a binary spectrum file
+
+    Parameters
+    ----------
+    path : str
+        The binary file
+
+    Returns
+    -------
+    dict, dict
+        The description of the file (version, columns, rows, source), and
+        the read-only columns by name
+    """
+
+    with open(path, "rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a binary spectrum file")
+        (length,) = struct.unpack("<I", file.read(4))
+        meta = json.loads(file.read(length))
+
+    offset = len(MAGIC) + 4 + length
+    shape = (len(meta["columns"]), meta["rows"])
+    if shape[1] == 0:
+        data = np.empty(shape)
+    else:
+        data = np.memmap(path, dtype="<f8", mode="r", offset=offset, shape=shape)
+    return meta, dict(zip(meta["columns"], data))
+
+
+# --------------------------------------------------------------------------------
+def convert(source, path=None):
+    """Convert a CSV spectrum (or table of templates) into a binary spectrum file
+
+    Parameters
+    ----------
+    source : str
+        The CSV file, with a Wavelength column (or the wavelength first)
+
+    path : str
+        The binary file (default=None, the CSV file with the .skaspec
+        extension)
+
+    Returns
+    -------
+    str
+        The binary file
+    """
+    if path is None:
+        path = binary_path(source)
+
+    write_spectrum_file(path, _parse(source), source=source)
+    return path
+
+
+# --------------------------------------------------------------------------------
+def binary_path(source):
+    """Path of the binary spectrum file converted from a CSV file"""
+    return os.path.splitext(source)[0] + SUFFIX
+
+
+# --------------------------------------------------------------------------------
+def sidecar_path(source):
+    """Path of the binary file of parsed arrays of a CSV file, in the cache"""
+    key = hashlib.sha256(os.path.abspath(source).encode()).hexdigest()[:32]
+    return os.path.join(ska.PATH_CACHE, "csv", key + SUFFIX)
+
+
+# --------------------------------------------------------------------------------
+def read_columns(path):
+    """Columns of a spectrum file, sorted by wavelength
+
+    Binary spectrum files are memory-mapped. The CSV spectra and templates of
+    the cache are read from their binary spectrum file. The arrays parsed
+    from other CSV files are kept in binary files in the cache (see
+    sidecar_path and CSV_CACHE), keyed by path, and the least recently used
+    are removed beyond CSV_CACHE_SIZE files. Binary files are (re)built
+    when they are missing, or when the size or modification time of the CSV
+    file changed, so that a CSV file is parsed only once.
+
+    Parameters
+    ----------
+    path : str
+        The binary or CSV file, with a Wavelength column (or the wavelength
+        as first column)
+
+    Returns
+    -------
+    dict
+        The columns by name
+    """
+
+    if path.endswith(SUFFIX):
+        return read_spectrum_file(path)[1]
+
+    sidecar = not is_cached(path)
+    if not sidecar:
+        binary = binary_path(path)
+    elif CSV_CACHE:
+        binary = sidecar_path(path)
+    else:
+        return _parse(path)
+
+    # The binary file of a cached CSV is next to it, and may have been built
+    # in another cache (see ska.cache.export_bundle): its path is not checked
+    stat = os.stat(path)
+    try:
+        meta, columns = read_spectrum_file(binary)
+        if (
+            meta["version"] == STORE_VERSION
+            and (not sidecar or meta.get("source") == os.path.abspath(path))
+            and meta.get("source_size") == stat.st_size
+            and meta.get("source_mtime") == stat.st_mtime_ns
+        ):
+            ska.profiling.lookup("store.binary", True)
+            if sidecar:
+                _touch(binary)
+            return columns
+    except (OSError, ValueError):
+        pass
+    ska.profiling.lookup("store.binary", False)
+
+    # Parse once, and keep the arrays if the cache is writable
+    columns = _parse(path)
+    try:
+        os.makedirs(os.path.dirname(binary), exist_ok=True)
+        write_spectrum_file(binary, columns, source=path)
+        if sidecar:
+            _evict_sidecars()
+    except OSError:
+        pass
+    return columns
+
+
+# --------------------------------------------------------------------------------
+def wavelength_column(names):
+    """Name of the column the rows are sorted by: Wavelength, else the first"""
+    names = list(names)
+    return "Wavelength" if "Wavelength" in names else names[0]
+
+
+# --------------------------------------------------------------------------------
+def clear_sidecars():
+    """Remove the binary files of parsed CSV spectra from the cache
+
+    Returns
+    -------
+    int
+        The number of files removed
+    """
+    paths = glob.glob(os.path.join(ska.PATH_CACHE, "csv", "*" + SUFFIX))
+    for path in paths:
+        os.unlink(path)
+    return len(paths)
+
+
+# --------------------------------------------------------------------------------
+def _touch(path):
+    """Mark a binary file of parsed CSV as used, for the eviction"""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+# --------------------------------------------------------------------------------
+def _evict_sidecars():
+    """Remove the least recently used binary files of parsed CSV spectra"""
+    paths = glob.glob(os.path.join(ska.PATH_CACHE, "csv", "*" + SUFFIX))
+    if len(paths) <= CSV_CACHE_SIZE:
+        return
+
+    used = {}
+    for path in paths:
+        try:
+            used[path] = os.stat(path).st_mtime_ns
+        except OSError:
+            pass
+    for path in sorted(used, key=used.get)[: len(used) - CSV_CACHE_SIZE]:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+# --------------------------------------------------------------------------------
+def is_cached(path):
+    """Whether a file is one of the spectra or templates of the cache"""
+    return os.path.dirname(os.path.abspath(path)) == os.path.abspath(ska.PATH_CACHE)
+
+
+# --------------------------------------------------------------------------------
+@ska.profiling.timed("store.parse_csv")
+def _parse(path):
+    """Columns of a CSV file, sorted by wavelength (see wavelength_column)
+
+    The multithreaded pyarrow engine of pandas is used if pyarrow is installed.
+    """
+    import pandas as pd
+
+    engine = "pyarrow" if importlib.util.find_spec("pyarrow") else None
+    table = pd.read_csv(path, engine=engine)
+
+    # Numerical columns only, others (e.g. comments) are ignored
+    columns = {}
+    for name in table.columns:
+        try:
+            columns[name] = table[name].to_numpy(dtype=float)
+        except (ValueError, TypeError):
+            pass
+
+    # Sort by wavelength, only if needed
+    if columns:
+        wave = columns[wavelength_column(columns)]
+        if np.any(wave[1:] < wave[:-1]):
+            order = np.argsort(wave, kind="stable")
+            columns = {name: column[order] for name, column in columns.items()}
+    return columns
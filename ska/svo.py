@@ -1,13 +1,82 @@
+import asyncio
+import bisect
+import concurrent.futures
 import io
+import json
 import os
+import sqlite3
 import sys
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
 from astropy.io.votable import parse
+import numpy as np
+import pandas as pd
 import rich
 
 import ska
 
+# SVO Filter Profile Service, the filter endpoint can be overridden (e.g. by a
+# local stand-in) with the SKA_SVO_URL environment variable
+URL_FILTER = os.environ.get(
+    "SKA_SVO_URL", "http://svo2.cab.inta-csic.es/theory/fps3/fps.php"
+)
+URL_FILTER_LIST = "https://svo.cab.inta-csic.es/files/svo/Public/HowTo/FPS/FPS_info.xml"
+URL_FILTER_LIST_OTHERS = (
+    "https://svo.cab.inta-csic.es/files/svo/Public/HowTo/FPS/others.xml"
+)
 
+# Network settings: timeout (s) of each request, number of retries after a
+# failure, base delay (s) of the exponential backoff, and concurrent downloads
+TIMEOUT = 30
+RETRIES = 3
+BACKOFF = 0.5
+JOBS = 8
+
+# Version of the binary filter sidecars, bump to rebuild all of them
+SIDECAR_VERSION = 1
+
+# Scalar parameters of the filter VOTables stored in the sidecars
+SIDECAR_PARAMS = [
+    "WavelengthCen",
+    "FWHM",
+    "WavelengthPivot",
+    "Fsun",
+    "DetectorType",
+    "Facility",
+    "Instrument",
+    "Band",
+]
+
+# Columns of the catalogue of filters, and the SVO parameters they are read
+# from. Wavelengths are converted from Angstrom to micron.
+CATALOGUE_COLUMNS = {
+    "id": "filterID",
+    "facility": "Facility",
+    "instrument": "Instrument",
+    "band": "Band",
+    "central_wavelength": "WavelengthCen",
+    "pivot_wavelength": "WavelengthPivot",
+    "fwhm": "FWHM",
+    "detector_type": "DetectorType",
+}
+
+# Index of filter IDs, loaded once per version of the filter list
+_INDEX = None
+_INDEX_LOCK = threading.Lock()
+
+# HTTP session shared by the downloads of single filters and the asyncio API
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+
+# Threads running the downloads of the asyncio API, and the downloads in
+# flight by (event loop, filter ID), awaited by all concurrent requests
+_EXECUTOR = None
+_INFLIGHT = {}
+
+
+@ska.profiling.timed("svo.download_filter_list")
 def download_filter_list():
     """Retrieve the list of filter IDs from `SVO Filter Service <http://svo2.cab.inta-csic.es/theory/fps`__
 
@@ -19,30 +88,35 @@ def download_filter_list():
 
     try:
 
+        session = get_session()
+
         # Main SVO filter list
-        r = requests.get(
-            "https://svo.cab.inta-csic.es/files/svo/Public/HowTo/FPS/FPS_info.xml"
-        )
+        r = fetch(session, URL_FILTER_LIST)
         SVOFilters = parse(io.BytesIO(r.content))
-        main_id = SVOFilters.get_first_table().to_table().to_pandas().filterID.to_list()
+        main = SVOFilters.get_first_table().to_table().to_pandas()
+        main_id = main.filterID.to_list()
 
         # Secondary SVO filter list
-        r = requests.get(
-            "https://svo.cab.inta-csic.es/files/svo/Public/HowTo/FPS/others.xml"
-        )
+        r = fetch(session, URL_FILTER_LIST_OTHERS)
         SVOFilters = parse(io.BytesIO(r.content))
-        other_id = SVOFilters.get_first_table().to_table().to_pandas()["__ID"].to_list()
+        others = SVOFilters.get_first_table().to_table().to_pandas()
+        other_id = others["__ID"].to_list()
+        others = others.rename(columns={"__ID": "filterID"})
 
         # Merge and Write to disk
         filter_id = main_id + other_id
+        ska.cache.ensure_cache()
         with open(ska.PATH_FILTER_LIST, "w") as file:
             for f in filter_id:
                 file.write(f"{f}\n")
+
+        # Catalogue of the metadata of the filters
+        write_filter_catalogue(pd.concat([main, others], ignore_index=True))
         return True
 
     except:
         # raise Exception("Error downloading filter list")
-        rich.print(f"[red]Error downloading filter {id} VOTable[/red].")
+        rich.print(f"[red]Error downloading the list of filters[/red].")
         return False
 
 
@@ -55,12 +129,246 @@ def load_filter_list():
         The list of filter IDS
 
     """
+    return filter_index().to_list()
+
+
+class FilterIndex:
+    """Index of the SVO filter IDs
+
+    Membership tests are constant-time, and the IDs sharing a prefix (e.g.
+    all filters of a facility or an instrument) are found by bisection in
+    the sorted IDs.
+    """
+
+    def __init__(self, ids):
+        self._ids = list(ids)
+        self._set = frozenset(self._ids)
+        self._sorted = sorted(self._set)
+
+    def __contains__(self, id):
+        return id in self._set
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def to_list(self):
+        """The filter IDs, in the order of the SVO filter list"""
+        return list(self._ids)
+
+    def startswith(self, prefix):
+        """Find the filter IDs starting with a prefix
+
+        Parameters
+        ==========
+        prefix : str
+            The beginning of the IDs, e.g. SLOAN/SDSS.
+
+        Returns
+        =======
+        list
+            The sorted filter IDs starting with prefix
+        """
+        start = bisect.bisect_left(self._sorted, prefix)
+        end = bisect.bisect_left(self._sorted, prefix + "\U0010ffff", lo=start)
+        return self._sorted[start:end]
+
+    def select(self, facility, instrument=None):
+        """Find the filter IDs of a facility, or of one of its instruments
+
+        Parameters
+        ==========
+        facility : str
+            The facility, the first part of the ID (e.g. SLOAN)
+
+        instrument : str
+            The instrument, the second part of the ID (e.g. SDSS)
+
+        Returns
+        =======
+        list
+            The sorted filter IDs
+        """
+        if instrument is None:
+            return self.startswith(f"{facility}/")
+        return self.startswith(f"{facility}/{instrument}.")
+
+
+def filter_index():
+    """Index of the filter IDs in the cache list
+
+    The list is downloaded if missing, read once, and read again only if the
+    file changed on disk.
+
+    Returns
+    =======
+    ska.svo.FilterIndex
+        The index of filter IDs
+    """
+    global _INDEX
+
     if not os.path.isfile(ska.PATH_FILTER_LIST):
         download_filter_list()
 
-    with open(ska.PATH_FILTER_LIST, "r") as file:
-        FILTERS = [filt.strip() for filt in file]
-    return FILTERS
+    stat = os.stat(ska.PATH_FILTER_LIST)
+    key = (ska.PATH_FILTER_LIST, stat.st_size, stat.st_mtime_ns)
+
+    with _INDEX_LOCK:
+        if _INDEX is None or _INDEX[0] != key:
+            with open(ska.PATH_FILTER_LIST, "r") as file:
+                index = FilterIndex(filt.strip() for filt in file if filt.strip())
+            _INDEX = (key, index)
+        return _INDEX[1]
+
+
+def write_filter_catalogue(table):
+    """Write the metadata of the SVO filters into the SQLite catalogue
+
+    Parameters
+    ==========
+    table : pd.DataFrame
+        The SVO filter list, with one row per filter and the SVO parameters
+        as columns (filterID, Facility, WavelengthPivot...). Missing
+        parameters are stored as NULL.
+    """
+
+    catalogue = pd.DataFrame(index=table.index)
+    for column, param in CATALOGUE_COLUMNS.items():
+        if param not in table.columns:
+            catalogue[column] = None
+        elif column in ["id", "facility", "instrument", "band"]:
+            values = table[param].map(
+                lambda v: v.decode() if isinstance(v, bytes) else v
+            )
+            catalogue[column] = values.where(values.astype(str).str.len() > 0)
+        else:
+            catalogue[column] = pd.to_numeric(table[param], errors="coerce")
+            if column.endswith("wavelength") or column == "fwhm":
+                catalogue[column] /= 1e4
+
+    catalogue = catalogue.dropna(subset=["id"]).drop_duplicates(subset="id")
+
+    # Write to a temporary database, moved in place once complete
+    tmp = f"{ska.PATH_FILTER_CATALOGUE}.{os.getpid()}.tmp"
+    if os.path.isfile(tmp):
+        os.unlink(tmp)
+    with sqlite3.connect(tmp) as con:
+        con.execute("""CREATE TABLE filters (
+                id TEXT PRIMARY KEY,
+                facility TEXT COLLATE NOCASE,
+                instrument TEXT COLLATE NOCASE,
+                band TEXT COLLATE NOCASE,
+                central_wavelength REAL,
+                pivot_wavelength REAL,
+                fwhm REAL,
+                detector_type INTEGER
+            )""")
+        con.executemany(
+            f"INSERT INTO filters VALUES ({', '.join('?' * len(CATALOGUE_COLUMNS))})",
+            catalogue.astype(object)
+            .where(catalogue.notna(), None)
+            .itertuples(index=False),
+        )
+        con.execute("CREATE INDEX idx_facility ON filters (facility, pivot_wavelength)")
+        con.execute("CREATE INDEX idx_instrument ON filters (instrument)")
+        con.execute("CREATE INDEX idx_pivot ON filters (pivot_wavelength)")
+        con.execute("CREATE INDEX idx_central ON filters (central_wavelength)")
+    con.close()
+    os.replace(tmp, ska.PATH_FILTER_CATALOGUE)
+
+
+def search_filters(
+    facility=None,
+    instrument=None,
+    band=None,
+    pivot=None,
+    central=None,
+    fwhm=None,
+    detector_type=None,
+    limit=None,
+):
+    """Search the local catalogue of SVO filters
+
+    The catalogue is built with the list of filters, and downloaded only if
+    missing. Text criteria are case-insensitive exact matches, and numeric
+    criteria are (min, max) ranges, inclusive, where either bound can be None.
+
+    Parameters
+    ==========
+    facility : str
+        The facility (e.g. LSST)
+
+    instrument : str
+        The instrument
+
+    band : str
+        The band
+
+    pivot : tuple
+        The range of pivot wavelength (micron)
+
+    central : tuple
+        The range of central wavelength (micron)
+
+    fwhm : tuple
+        The range of full width at half maximum (micron)
+
+    detector_type : int
+        Photon (1) or energy (0) counter
+
+    limit : int
+        The maximum number of filters returned
+
+    Returns
+    =======
+    pd.DataFrame
+        The filters matching all the criteria, sorted by pivot wavelength
+    """
+
+    if not os.path.isfile(ska.PATH_FILTER_CATALOGUE):
+        download_filter_list()
+
+    clauses, values = [], []
+    for column, value in [
+        ("facility", facility),
+        ("instrument", instrument),
+        ("band", band),
+        ("detector_type", detector_type),
+    ]:
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            values.append(value)
+
+    for column, bounds in [
+        ("pivot_wavelength", pivot),
+        ("central_wavelength", central),
+        ("fwhm", fwhm),
+    ]:
+        if bounds is None:
+            continue
+        low, high = bounds
+        if low is not None:
+            clauses.append(f"{column} >= ?")
+            values.append(low)
+        if high is not None:
+            clauses.append(f"{column} <= ?")
+            values.append(high)
+
+    query = "SELECT * FROM filters"
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    query += " ORDER BY pivot_wavelength, id"
+    if limit is not None:
+        query += " LIMIT ?"
+        values.append(int(limit))
+
+    con = sqlite3.connect(f"file:{ska.PATH_FILTER_CATALOGUE}?mode=ro", uri=True)
+    try:
+        return pd.read_sql_query(query, con, params=values)
+    finally:
+        con.close()
 
 
 def download_filter(id, force=False):
@@ -81,31 +389,20 @@ def download_filter(id, force=False):
     """
 
     # Test if the filter ID is valid
-    FILTERS = load_filter_list()
-    if id not in FILTERS:
+    if id not in filter_index():
         rich.print(
             f"[red]Unknown filter ID {id}[/red]. Use [green]ska filter[/green] to list available filters"
         )
         sys.exit(1)
         # raise ValueError(f"Unknown filter ID {id}. Use ska filter to list available filters")
 
-    # SVO Base URL for queries
-    url = f"http://svo2.cab.inta-csic.es/theory/fps3/fps.php?"
-
     # Output name for the filter VOTable
-    out = os.path.join(ska.PATH_CACHE, id.replace("/", "_") + ".xml")
+    out = filter_path(id)
 
     # Download VOTable
     if (not os.path.isfile(out)) or force:
         try:
-            # Request the filter VOTable
-            r = requests.get(url, params={"ID": id})
-            SVOFilter = parse(io.BytesIO(r.content))
-            filter_info = SVOFilter.get_first_table()
-
-            # Write it to disk
-            # os.makedirs(ska.PATH_CACHE, exist_ok=True)
-            SVOFilter.to_xml(out)
+            _fetch_filter(get_session(), id)
 
         except:
             rich.print(f"[red]Error downloading filter {id} VOTable[/red].")
@@ -114,3 +411,403 @@ def download_filter(id, force=False):
 
     # Return path to filter VOTable
     return out
+
+
+def download_filters(ids, force=False, jobs=JOBS):
+    """Download many filter VOTables concurrently from `SVO Filter Service <http://svo2.cab.inta-csic.es/theory/fps/index.php?mode=voservice>`__
+
+    Downloads share a pool of HTTP connections and are spread over a pool of
+    threads. Each request has a timeout, and is retried with an exponential
+    backoff on network and server errors. A failure does not stop the other
+    downloads.
+
+    Parameters
+    ==========
+    ids : list
+        The unique SVO filter identifiers to be downloaded
+
+    force : bool
+        If True, the filter VOTables will be downloaded even if they are already cached
+
+    jobs : int
+        The number of concurrent downloads
+
+    Returns
+    =======
+    dict
+        The error message of each filter ID, None for a success
+    """
+
+    report = {}
+    todo = []
+    index = filter_index()
+    for id in ids:
+        if id not in index:
+            report[id] = "Unknown filter ID"
+        elif force or not os.path.isfile(filter_path(id)):
+            todo.append(id)
+        else:
+            report[id] = None
+
+    if todo:
+        session = get_session(pool_size=jobs)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as pool:
+            futures = {pool.submit(_fetch_filter, session, id): id for id in todo}
+            for future in concurrent.futures.as_completed(futures):
+                error = future.exception()
+                report[futures[future]] = (
+                    None if error is None else f"{type(error).__name__}: {error}"
+                )
+        if session is not _SESSION:
+            session.close()
+
+    return {id: report[id] for id in ids}
+
+
+async def afetch_filter(id, force=False):
+    """Download a filter VOTable without blocking the asyncio event loop
+
+    The download runs in a pool of ``ska.svo.JOBS`` threads. Concurrent
+    requests for the same filter ID share a single download. The VOTable and
+    its sidecar are written to the cache, which is then used by
+    ska.svo.load_filter and ska.Filter as usual.
+
+    Parameters
+    ==========
+    id : str
+        The unique SVO filter identifier to be downloaded
+
+    force : bool
+        If True, the filter VOTable will be downloaded even if it is already cached
+
+    Returns
+    =======
+    str
+        The path to the filter VOTable file
+
+    Raises
+    ======
+    ValueError
+        If the filter ID is unknown
+
+    requests.RequestException
+        If the download failed after all retries
+    """
+
+    if not force and os.path.isfile(filter_path(id)):
+        return filter_path(id)
+
+    loop = asyncio.get_running_loop()
+    key = (loop, id)
+    if key not in _INFLIGHT:
+        future = loop.run_in_executor(_executor(), _download_filter, id, force)
+        future.add_done_callback(lambda _: _INFLIGHT.pop(key, None))
+        _INFLIGHT[key] = future
+
+    # Shielded: a cancelled caller does not cancel the download of the others
+    return await asyncio.shield(_INFLIGHT[key])
+
+
+async def aload_filter(id):
+    """Load the parameters and transmission of a filter without blocking the event loop
+
+    Parameters
+    ==========
+    id : str
+        The unique SVO filter identifier
+
+    Returns
+    =======
+    dict, np.ndarray
+        The scalar parameters and the (2, N) array of wavelength (micron)
+        and transmission
+    """
+    await afetch_filter(id)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor(), load_filter, id)
+
+
+def _download_filter(id, force=False):
+    """Download a filter VOTable if needed, raising exceptions on failure"""
+
+    if id not in filter_index():
+        raise ValueError(f"Unknown filter ID {id}")
+
+    out = filter_path(id)
+    if force or not os.path.isfile(out):
+        _fetch_filter(get_session(), id)
+    return out
+
+
+def _executor():
+    """Pool of threads running the downloads of the asyncio API"""
+    global _EXECUTOR
+
+    if _EXECUTOR is None:
+        _EXECUTOR = concurrent.futures.ThreadPoolExecutor(
+            max_workers=JOBS, thread_name_prefix="ska-svo"
+        )
+    return _EXECUTOR
+
+
+def get_session(pool_size=None):
+    """HTTP session with a pool of connections to the SVO
+
+    Parameters
+    ==========
+    pool_size : int
+        The number of connections kept in the pool. If None, the session
+        shared by single downloads is returned.
+
+    Returns
+    =======
+    requests.Session
+        The session
+    """
+    global _SESSION
+
+    if pool_size is None:
+        with _SESSION_LOCK:
+            if _SESSION is None:
+                _SESSION = get_session(pool_size=JOBS)
+        return _SESSION
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+@ska.profiling.timed("svo.fetch")
+def fetch(session, url, params=None, timeout=None, retries=None):
+    """GET a URL, with a timeout and retries with exponential backoff
+
+    Connection errors, timeouts, and server errors (5xx, 429) are retried.
+    Other HTTP errors are raised immediately.
+
+    Parameters
+    ==========
+    session : requests.Session
+        The HTTP session
+
+    url : str
+        The URL
+
+    params : dict
+        The query parameters
+
+    timeout : float
+        The timeout (s) of each request (default: ska.svo.TIMEOUT)
+
+    retries : int
+        The number of retries (default: ska.svo.RETRIES)
+
+    Returns
+    =======
+    requests.Response
+        The response
+    """
+
+    timeout = TIMEOUT if timeout is None else timeout
+    retries = RETRIES if retries is None else retries
+
+    for attempt in range(retries + 1):
+        try:
+            r = session.get(url, params=params, timeout=timeout)
+            if r.status_code != 429 and r.status_code < 500:
+                r.raise_for_status()
+                ska.profiling.count("svo.bytes_downloaded", len(r.content))
+                return r
+            error = requests.HTTPError(f"{r.status_code} {r.reason}", response=r)
+        except (requests.ConnectionError, requests.Timeout) as exception:
+            error = exception
+
+        if attempt < retries:
+            ska.profiling.count("svo.retries")
+            time.sleep(BACKOFF * 2**attempt)
+
+    raise error
+
+
+def _fetch_filter(session, id):
+    """Download a filter VOTable, and write it with its sidecar to the cache"""
+
+    r = fetch(session, URL_FILTER, params={"ID": id})
+    with ska.profiling.stage("svo.parse_votable"):
+        SVOFilter = parse(io.BytesIO(r.content))
+    SVOFilter.get_first_table()  # raises if the SVO returned no filter
+
+    # Write it to disk, atomically as other threads may read the cache
+    ska.cache.ensure_cache()
+    out = filter_path(id)
+    tmp = f"{out}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as file:
+        file.write(r.content)
+    os.replace(tmp, out)
+    write_filter_sidecar(out, SVOFilter)
+
+
+def filter_path(id, ext=".xml"):
+    """Path to a cached filter file
+
+    Parameters
+    ==========
+    id : str
+        The unique SVO filter identifier
+
+    ext : str
+        The file extension: .xml for the VOTable, .npy and .json for the sidecar
+
+    Returns
+    =======
+    str
+        The path to the file in the cache
+    """
+    return os.path.join(ska.PATH_CACHE, id.replace("/", "_") + ext)
+
+
+@ska.profiling.timed("svo.write_sidecar")
+def write_filter_sidecar(path, VOFilter=None):
+    """Convert a filter VOTable into its binary sidecar
+
+    The sidecar is made of two files next to the VOTable: a .npy array with
+    the wavelength (micron) and transmission where the transmission is
+    non-zero, which can be memory-mapped, and a .json file with the scalar
+    parameters of the filter.
+
+    Parameters
+    ==========
+    path : str
+        The path to the filter VOTable
+
+    VOFilter : astropy.io.votable.tree.VOTableFile
+        The parsed VOTable, read from path if not provided
+
+    Returns
+    =======
+    dict, np.ndarray
+        The scalar parameters and the (2, N) array of wavelength (micron)
+        and transmission
+    """
+
+    if VOFilter is None:
+        with ska.profiling.stage("svo.parse_votable"):
+            VOFilter = parse(path)
+
+    # Select non-zero transmission and convert to micron
+    data = VOFilter.get_first_table().array.data
+    keep = data["Transmission"] >= 1e-5
+    arr = np.vstack(
+        [
+            np.asarray(data["Wavelength"][keep], dtype=float) / 1e4,
+            np.asarray(data["Transmission"][keep], dtype=float),
+        ]
+    )
+
+    # Scalar parameters, as JSON types
+    params = {}
+    for name in SIDECAR_PARAMS:
+        try:
+            value = VOFilter.get_field_by_id(name).value
+        except:
+            value = None
+        if isinstance(value, bytes):
+            value = value.decode()
+        elif isinstance(value, np.generic):
+            value = value.item()
+        params[name] = value
+
+    stat = os.stat(path)
+    meta = {
+        "version": SIDECAR_VERSION,
+        "source_size": stat.st_size,
+        "source_mtime": stat.st_mtime_ns,
+        "params": params,
+    }
+
+    # Write atomically, other processes and threads may be reading or
+    # writing the same sidecar
+    base = os.path.splitext(path)[0]
+    suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(base + ".npy" + suffix, "wb") as file:
+            np.save(file, arr)
+        with open(base + ".json" + suffix, "w") as file:
+            json.dump(meta, file)
+        os.replace(base + ".npy" + suffix, base + ".npy")
+        os.replace(base + ".json" + suffix, base + ".json")
+    except OSError:
+        # Read-only cache: the VOTable is simply parsed on every load
+        for ext in [".npy", ".json"]:
+            if os.path.isfile(base + ext + suffix):
+                os.unlink(base + ext + suffix)
+
+    arr.flags.writeable = False
+    return params, arr
+
+
+@ska.profiling.timed("svo.read_sidecar")
+def read_filter_sidecar(path):
+    """Read the binary sidecar of a filter VOTable
+
+    Parameters
+    ==========
+    path : str
+        The path to the filter VOTable
+
+    Returns
+    =======
+    dict, np.ndarray
+        The scalar parameters and the read-only, memory-mapped (2, N) array
+        of wavelength and transmission. None if the sidecar does not exist
+        or is older than the VOTable.
+    """
+
+    base = os.path.splitext(path)[0]
+    try:
+        with open(base + ".json", "r") as file:
+            meta = json.load(file)
+        stat = os.stat(path)
+        if (
+            meta["version"] != SIDECAR_VERSION
+            or meta["source_size"] != stat.st_size
+            or meta["source_mtime"] != stat.st_mtime_ns
+        ):
+            return None
+        arr = np.load(base + ".npy", mmap_mode="r")
+    except (OSError, ValueError, KeyError):
+        return None
+
+    return meta["params"], arr
+
+
+def load_filter(id):
+    """Load the parameters and transmission of a filter from the cache
+
+    The VOTable is downloaded if needed, and its binary sidecar is (re)built
+    when missing or stale.
+
+    Parameters
+    ==========
+    id : str
+        The unique SVO filter identifier
+
+    Returns
+    =======
+    dict, np.ndarray
+        The scalar parameters and the (2, N) array of wavelength (micron)
+        and transmission
+    """
+
+    path = filter_path(id)
+    cached = os.path.isfile(path)
+    ska.profiling.lookup("svo.votable", cached)
+    if not cached:
+        download_filter(id)
+
+    sidecar = read_filter_sidecar(path)
+    ska.profiling.lookup("svo.sidecar", sidecar is not None)
+    if sidecar is None:
+        sidecar = write_filter_sidecar(path)
+    return sidecar
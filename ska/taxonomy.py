@@ -0,0 +1,209 @@
+import os
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+import rich
+import ska
+
+# Template bank of the cached file, loaded once per version of the file
+_BANK = None
+_BANK_LOCK = threading.Lock()
+
+
+class TemplateBank:
+    # --------------------------------------------------------------------------------
+    def __init__(self, path=None):
+        """Initiate a SKA bank of asteroid template spectra (Mahlke+2022 taxonomy)
+
+        The mean reflectance of all the classes and their upper and lower
+        envelopes are read once and stored as 2D arrays, with one class per
+        row, sharing a wavelength grid.
+
+        Parameters
+        ----------
+        path : str
+            The CSV or binary file of templates (default=None, the cached
+            Mahlke+2022 templates). Its first column is the wavelength (micron), followed by
+            one column per class, and the X_upper and X_lower offsets of the
+            envelope of each class X.
+        """
+
+        if path is None:
+            ska.cache.ensure_mahlke_taxonomy()
+            path = ska.PATH_MAHLKE
+
+        # Columns sorted by wavelength, from the binary file of cached templates
+        templates = ska.store.read_columns(path)
+        names = list(templates)
+
+        # Store attributes
+        self.classes = [
+            c
+            for c in names[1:]
+            if not c.endswith("_upper") and not c.endswith("_lower")
+        ]
+        self.wave = np.array(templates[names[0]])
+        self.refl = np.vstack([templates[c] for c in self.classes])
+
+        # Envelopes, from the offsets to the mean reflectance
+        self.upper = self.refl.copy()
+        self.lower = self.refl.copy()
+        for i, c in enumerate(self.classes):
+            if f"{c}_upper" in templates:
+                self.upper[i] += templates[f"{c}_upper"]
+            if f"{c}_lower" in templates:
+                self.lower[i] += templates[f"{c}_lower"]
+
+        for arr in [self.wave, self.refl, self.upper, self.lower]:
+            arr.flags.writeable = False
+
+    # --------------------------------------------------------------------------------
+    def __len__(self):
+        return len(self.classes)
+
+    # --------------------------------------------------------------------------------
+    def __contains__(self, type):
+        return type in self.classes
+
+    # --------------------------------------------------------------------------------
+    def spectrum(self, type, envelope=None):
+        """The reflectance spectrum of a class
+
+        Parameters
+        ----------
+        type : str
+            The name of the class (A, B, C, D, E, K, L... V, Z)
+
+        envelope : str
+            Set to "upper" or "lower" to get an envelope of the class instead
+            of its mean reflectance (default=None)
+
+        Returns
+        -------
+        ska.Spectrum
+            The reflectance spectrum
+        """
+
+        if type not in self.classes:
+            rich.print(
+                f"[red]Type[/red] [bright_cyan]{type}[/bright_cyan] [red]not found in Mahlke+2022 taxonomy.[/red]"
+            )
+            sys.exit(1)
+
+        refl = {None: self.refl, "upper": self.upper, "lower": self.lower}[envelope]
+
+        # The arrays of the bank are shared, without copy
+        spectrum = ska.Spectrum()
+        spectrum.from_arrays(
+            self.wave, refl[self.classes.index(type)], reflectance=True
+        )
+        return spectrum
+
+    # --------------------------------------------------------------------------------
+    def collection(self, envelope=None):
+        """The reflectance spectra of all the classes, as a dense collection
+
+        Parameters
+        ----------
+        envelope : str
+            Set to "upper" or "lower" to get the envelopes of the classes
+            instead of their mean reflectance (default=None)
+
+        Returns
+        -------
+        ska.SpectrumCollection
+            The collection, identified by class
+        """
+        refl = {None: self.refl, "upper": self.upper, "lower": self.lower}[envelope]
+        return ska.SpectrumCollection(self.wave, refl, ids=self.classes, is_refl=True)
+
+    # --------------------------------------------------------------------------------
+    def colors(self, pairs, phot_sys="Vega", vega=None, sun=None):
+        """Computes the colors of all the classes, with their bounds, in pairs of filters.
+
+        The fluxes of the mean reflectance and of both envelopes of all the
+        classes are computed in a single product with the filter weights.
+        The bounds of each color are the extreme colors of reflectances within
+        the envelope: the flux of the upper envelope in one filter against the
+        flux of the lower envelope in the other.
+
+        Parameters
+        ----------
+        pairs : list of tuple
+            The pairs of filters (filter_1, filter_2), each a SKA Filter object
+            or a filter unique ID (see SVO filter service)
+
+        phot_sys : str
+            Photometric system in which to report the colors (default=Vega)
+
+        vega : ska.Spectrum
+            The spectrum of Vega (default=None, the cached spectrum of Vega)
+
+        sun : ska.Spectrum
+            The spectrum of the Sun (default=None, the cached spectrum of the Sun)
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per class, with a filter_1-filter_2 column per pair,
+            followed by the filter_1-filter_2_lower and filter_1-filter_2_upper
+            bounds
+        """
+
+        bank, idx_1, idx_2 = ska.colors._pairs_bank(pairs)
+
+        # Read spectrum of the Sun if not provided
+        if not isinstance(sun, ska.Spectrum):
+            ska.cache.ensure_sun_and_vega()
+            sun = ska.Spectrum(ska.PATH_SUN)
+
+        # Fluxes of the mean and envelopes of all classes, in a single pass
+        n = len(self.classes)
+        stack = np.vstack([self.refl, self.upper, self.lower])
+        fluxes = bank.compute_flux((self.wave, stack), sun=sun)
+        mean, upper, lower = fluxes[:n], fluxes[n : 2 * n], fluxes[2 * n :]
+
+        # Colors in ST photometric system, and their bounds
+        with np.errstate(divide="ignore", invalid="ignore"):
+            colors = -2.5 * np.log10(mean[:, idx_1] / mean[:, idx_2])
+            colors_lower = -2.5 * np.log10(upper[:, idx_1] / lower[:, idx_2])
+            colors_upper = -2.5 * np.log10(lower[:, idx_1] / upper[:, idx_2])
+
+        # Colors in the requested photometric system
+        table = np.hstack(
+            [
+                ska.colors._to_phot_sys(c, bank, idx_1, idx_2, phot_sys, vega)
+                for c in [colors, colors_lower, colors_upper]
+            ]
+        )
+
+        names = [f"{bank.ids[i]}-{bank.ids[j]}" for i, j in zip(idx_1, idx_2)]
+        columns = names + [f"{n}_lower" for n in names] + [f"{n}_upper" for n in names]
+        return pd.DataFrame(table, index=self.classes, columns=columns)
+
+
+# --------------------------------------------------------------------------------
+def template_bank():
+    """Bank of the cached templates of Mahlke+2022 taxonomy
+
+    The templates are downloaded if missing, read once, and read again only
+    if the file changed on disk.
+
+    Returns
+    -------
+    ska.TemplateBank
+        The bank of templates
+    """
+    global _BANK
+
+    ska.cache.ensure_mahlke_taxonomy()
+    stat = os.stat(ska.PATH_MAHLKE)
+    key = (ska.PATH_MAHLKE, stat.st_size, stat.st_mtime_ns)
+
+    with _BANK_LOCK:
+        if _BANK is None or _BANK[0] != key:
+            _BANK = (key, TemplateBank(ska.PATH_MAHLKE))
+        return _BANK[1]
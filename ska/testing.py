@@ -0,0 +1,337 @@
+"""Offline stand-in of the SVO Filter Profile Service, for testing ska"""
+
+import collections
+import glob
+import http.server
+import io
+import os
+import threading
+import time
+import urllib.parse
+
+import numpy as np
+
+import ska
+
+# Body returned by the SVO for an unknown filter ID
+_UNKNOWN = b"""<?xml version="1.0" encoding="UTF-8"?>
+<VOTABLE version="1.4" xmlns="http://www.ivoa.net/xml/VOTable/v1.3">
+  <RESOURCE type="results">
+    <INFO name="QUERY_STATUS" value="ERROR">Filter not found</INFO>
+  </RESOURCE>
+</VOTABLE>
+"""
+
+
+class MockSVO:
+    """Local HTTP server mimicking the SVO Filter Profile Service
+
+    Filter VOTables and the lists of filter IDs are served from memory on a
+    free port of localhost. Used as a context manager, the endpoints of
+    ska.svo point to the server, and the cache of ska can be redirected to a
+    temporary directory, so that downloads, synchronous or asyncio, can be
+    exercised offline::
+
+        with MockSVO(directory="fixtures", cache=tmp_path) as svo:
+            filt = await ska.Filter.aload("Generic/Johnson.V")
+            assert svo.requests["Generic/Johnson.V"] == 1
+    """
+
+    # --------------------------------------------------------------------------------
+    def __init__(self, filters=None, directory=None, cache=None, latency=0.0):
+        """Initiate a mock SVO server
+
+        Parameters
+        ----------
+        filters : dict
+            The VOTables to serve, as bytes or path to a file, by filter ID
+            (default=None)
+
+        directory : str
+            A directory of filter VOTables to serve, named as in the cache of
+            ska (e.g. Generic_Johnson.V.xml) (default=None)
+
+        cache : str
+            If provided, the cache of ska is moved to this directory while the
+            server runs (default=None, the cache is not changed)
+
+        latency : float
+            Delay (s) before each response (default=0)
+        """
+
+        self.filters = {}
+        self.cache = cache
+        self.latency = latency
+
+        # Number of requests by filter ID, and number of failures to simulate
+        self.requests = collections.Counter()
+        self.failures = collections.Counter()
+
+        if directory is not None:
+            for path in sorted(glob.glob(os.path.join(directory, "*.xml"))):
+                id = os.path.basename(path)[:-4].replace("_", "/")
+                self.add_filter(id, path)
+
+        for id, votable in (filters or {}).items():
+            self.add_filter(id, votable)
+
+        self._server = None
+        self._saved = None
+        self._lock = threading.Lock()
+
+    # --------------------------------------------------------------------------------
+    def __enter__(self):
+        self.start()
+        return self
+
+    # --------------------------------------------------------------------------------
+    def __exit__(self, *exc):
+        self.stop()
+
+    # --------------------------------------------------------------------------------
+    @property
+    def url(self):
+        """The root URL of the server"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    # --------------------------------------------------------------------------------
+    def add_filter(self, id, votable):
+        """Serve a filter VOTable
+
+        Parameters
+        ----------
+        id : str
+            The filter unique ID
+
+        votable : bytes or str
+            The VOTable, or the path to the VOTable file
+        """
+        if isinstance(votable, str):
+            with open(votable, "rb") as file:
+                votable = file.read()
+        self.filters[id] = votable
+
+    # --------------------------------------------------------------------------------
+    def fail(self, id, count=1):
+        """Answer the next requests for a filter with a server error (503)
+
+        Parameters
+        ----------
+        id : str
+            The filter unique ID
+
+        count : int
+            The number of requests to fail (default=1)
+        """
+        with self._lock:
+            self.failures[id] += count
+
+    # --------------------------------------------------------------------------------
+    def start(self):
+        """Start the server, and point ska.svo (and the cache) to it"""
+
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.mock = self
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+        self._saved = _patch(
+            ska.svo,
+            URL_FILTER=f"{self.url}/fps.php",
+            URL_FILTER_LIST=f"{self.url}/FPS_info.xml",
+            URL_FILTER_LIST_OTHERS=f"{self.url}/others.xml",
+        )
+        if self.cache is not None:
+            self._saved += _patch(
+                ska,
+                PATH_CACHE=self.cache,
+                PATH_FILTER_LIST=os.path.join(self.cache, "svo_filters.txt"),
+                PATH_FILTER_CATALOGUE=os.path.join(self.cache, "svo_filters.sqlite"),
+                PATH_VEGA=os.path.join(self.cache, "spectrum_vega.csv"),
+                PATH_SUN=os.path.join(self.cache, "spectrum_sun.csv"),
+                PATH_MAHLKE=os.path.join(self.cache, "template_mahlke2022.csv"),
+                PATH_REFERENCE_FLUXES=os.path.join(self.cache, "reference_fluxes.json"),
+            )
+            _reset()
+
+    # --------------------------------------------------------------------------------
+    def stop(self):
+        """Stop the server, and restore ska.svo (and the cache)"""
+
+        self._server.shutdown()
+        self._server.server_close()
+
+        _restore(self._saved)
+        if self.cache is not None:
+            _reset()
+
+    # --------------------------------------------------------------------------------
+    def _respond(self, path, query):
+        """Status and body of the response to a request"""
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        if path.endswith("/FPS_info.xml"):
+            return 200, _filter_list("filterID", self.filters)
+        if path.endswith("/others.xml"):
+            return 200, _filter_list("__ID", {})
+
+        id = query.get("ID", [""])[0]
+        with self._lock:
+            self.requests[id] += 1
+            if self.failures[id] > 0:
+                self.failures[id] -= 1
+                return 503, b""
+        return 200, self.filters.get(id, _UNKNOWN)
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    """Request handler of the mock SVO server"""
+
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        status, body = self.server.mock._respond(
+            url.path, urllib.parse.parse_qs(url.query)
+        )
+        self.send_response(status)
+        self.send_header("Content-Type", "text/xml")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+# --------------------------------------------------------------------------------
+def make_votable(id, wave, trans, detector_type=0, **params):
+    """Build a filter VOTable in the format of the SVO Filter Profile Service
+
+    Parameters
+    ----------
+    id : str
+        The filter unique ID
+
+    wave : np.ndarray
+        The wavelength (Angstrom)
+
+    trans : np.ndarray
+        The transmission
+
+    detector_type : int
+        Photon (1) or energy (0) counter (default=0)
+
+    **params
+        Other parameters of the filter, e.g. Facility, Band, or Fsun. The
+        central and pivot wavelengths and the FWHM are computed from the
+        transmission if not provided.
+
+    Returns
+    -------
+    bytes
+        The VOTable
+    """
+    from astropy.io.votable.tree import (
+        Field,
+        Param,
+        Resource,
+        TableElement,
+        VOTableFile,
+    )
+
+    wave = np.asarray(wave, dtype=float)
+    trans = np.asarray(trans, dtype=float)
+
+    # Parameters derived from the transmission
+    half = wave[trans >= trans.max() / 2]
+    derived = {
+        "WavelengthCen": float((half[0] + half[-1]) / 2),
+        "FWHM": float(half[-1] - half[0]),
+        "WavelengthPivot": float(
+            np.sqrt(np.trapz(trans * wave, wave) / np.trapz(trans / wave, wave))
+        ),
+    }
+    params = {**derived, **params}
+
+    votable = VOTableFile()
+    resource = Resource(type="results")
+    votable.resources.append(resource)
+    table = TableElement(votable)
+    resource.tables.append(table)
+
+    values = {"filterID": id, "WavelengthUnit": "Angstrom"}
+    values["DetectorType"] = str(detector_type)
+    values.update(params)
+    for name, value in values.items():
+        if isinstance(value, str):
+            kwargs = {"datatype": "char", "arraysize": "*"}
+        else:
+            kwargs = {"datatype": "double"}
+        table.params.append(Param(votable, name=name, ID=name, value=value, **kwargs))
+
+    table.fields.extend(
+        [
+            Field(votable, name="Wavelength", ID="Wavelength", datatype="double"),
+            Field(votable, name="Transmission", ID="Transmission", datatype="double"),
+        ]
+    )
+    table.create_arrays(len(wave))
+    table.array["Wavelength"] = wave
+    table.array["Transmission"] = trans
+
+    out = io.BytesIO()
+    votable.to_xml(out)
+    return out.getvalue()
+
+
+# --------------------------------------------------------------------------------
+def _filter_list(column, filters):
+    """VOTable listing filters and their parameters, as the filter lists of the SVO"""
+    from astropy.io.votable import from_table, parse
+    from astropy.table import Table
+
+    params = [p for p in ska.svo.CATALOGUE_COLUMNS.values() if p != "filterID"]
+    rows = {column: [], **{param: [] for param in params}}
+    for id, votable in sorted(filters.items()):
+        VOFilter = parse(io.BytesIO(votable))
+        rows[column].append(id)
+        for param in params:
+            try:
+                value = VOFilter.get_field_by_id(param).value
+            except KeyError:
+                value = ""
+            rows[param].append(str(value))
+
+    out = io.BytesIO()
+    from_table(Table({k: np.array(v, dtype=str) for k, v in rows.items()})).to_xml(out)
+    return out.getvalue()
+
+
+# --------------------------------------------------------------------------------
+def _patch(module, **values):
+    """Set attributes of a module, returning their previous values"""
+    saved = [(module, name, getattr(module, name)) for name in values]
+    for name, value in values.items():
+        setattr(module, name, value)
+    return saved
+
+
+# --------------------------------------------------------------------------------
+def _restore(saved):
+    """Restore attributes of modules set by _patch"""
+    for module, name, value in reversed(saved):
+        setattr(module, name, value)
+
+
+# --------------------------------------------------------------------------------
+def _reset():
+    """Forget the filters and filter list loaded from the cache"""
+    ska.svo._INDEX = None
+    ska.Filter.clear_registry()
+    ska.colors._filter_bank.cache_clear()
+    ska.blackbody._table.cache_clear()
+    ska.interp.clear_plans()
+    with ska.cache._REFERENCE_LOCK:
+        ska.cache._REFERENCE_FLUXES = None